@@ -0,0 +1,136 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.dispatch import Signal
+
+logger = logging.getLogger('api.query_budget')
+
+# Отправляется при превышении бюджета: сюда подключается экспорт метрик.
+query_budget_exceeded = Signal()
+
+FINGERPRINT_PATTERNS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)'), '(...)'),
+    (re.compile(r'"s\w+_x\w+"'), '?'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def fingerprint(sql):
+    """SQL без значений: запросы, отличающиеся только ими, совпадают."""
+    for pattern, replacement in FINGERPRINT_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def get_query_budget(view_class, action):
+    """Бюджет запросов действия вьюсета или None, если он не объявлен."""
+    return getattr(view_class, 'query_budgets', {}).get(action)
+
+
+def resolve_budget(view_func, method):
+    """(действие, бюджет) для функции-представления из URLconf."""
+    actions = getattr(view_func, 'actions', None)
+    if not actions:
+        return None, None
+    action = actions.get(method.lower())
+    return action, get_query_budget(view_func.cls, action)
+
+
+class QueryCounter:
+    """Считает запросы всех подключений к базе и время их выполнения.
+
+    Хранит исходный SQL с плейсхолдерами, а отпечатки строит только
+    по запросу, чтобы учет почти не замедлял обычные запросы.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    @contextmanager
+    def track(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def fingerprints(self, limit=None):
+        """Отпечатки SQL с числом выполнений, самые частые первыми."""
+        counts = Counter()
+        for sql, count in self.statements.items():
+            counts[fingerprint(sql)] += count
+        return counts.most_common(limit)
+
+
+class QueryBudgetMiddleware:
+    """Учитывает запросы к базе и сверяет их с бюджетом действия.
+
+    Бюджет объявляется во вьюсете: query_budgets = {'list': 3, ...}.
+    Превышение пишется в лог api.query_budget вместе с самыми частыми
+    отпечатками SQL и отправляется сигналом query_budget_exceeded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with counter.track():
+            response = self.get_response(request)
+        action, budget = getattr(request, 'query_budget', (None, None))
+        logger.debug(
+            '%s %s: %d запросов, %.1f мс',
+            request.method, request.path, counter.count,
+            counter.duration * 1000,
+        )
+        if budget is not None and counter.count > budget:
+            self.report(request, action, budget, counter)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = resolve_budget(view_func, request.method)
+
+    def report(self, request, action, budget, counter):
+        fingerprints = counter.fingerprints(
+            settings.QUERY_BUDGET_FINGERPRINTS
+        )
+        logger.warning(
+            'Превышен бюджет запросов: %s %s (%s) — %d из %d, %.1f мс\n%s',
+            request.method, request.path, action, counter.count, budget,
+            counter.duration * 1000,
+            '\n'.join(f'{count} × {sql}' for sql, count in fingerprints),
+            extra={
+                'action': action,
+                'budget': budget,
+                'queries': counter.count,
+                'duration': counter.duration,
+                'fingerprints': fingerprints,
+            },
+        )
+        query_budget_exceeded.send(
+            sender=self.__class__,
+            request=request,
+            action=action,
+            budget=budget,
+            queries=counter.count,
+            duration=counter.duration,
+            fingerprints=fingerprints,
+        )
@@ -0,0 +1,178 @@
+from django.db import connections, router
+from django.db.models import sql
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from reviews.models import GenreTitle, Title
+from reviews.search import normalize_search_text, write_atomic
+from . import references
+from .serializers import BulkTitleSerializer
+from .signals import REVIEWS_OF_TITLE, bump_on_commit
+
+BATCH_SIZE = 500
+
+
+def insert_with_ids(model, objects):
+    """Вставляет объекты пакетами без сигналов моделей и заполняет pk.
+
+    Если база не возвращает строки из bulk_create (SQLite в Django 3.2),
+    каждый пакет вставляется одним INSERT: под блокировкой записи
+    AUTOINCREMENT выдает строкам одного INSERT подряд идущие id, и они
+    восстанавливаются по lastrowid.
+    """
+    if not objects:
+        return
+    using = router.db_for_write(model)
+    connection = connections[using]
+    if connection.features.can_return_rows_from_bulk_insert:
+        model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+        return
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    batch_size = min(
+        BATCH_SIZE, connection.ops.bulk_batch_size(fields, objects)
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(objects), batch_size):
+            batch = objects[start:start + batch_size]
+            query = sql.InsertQuery(model)
+            query.insert_values(fields, batch)
+            (statement, params), = query.get_compiler(using).as_sql()
+            cursor.execute(statement, params)
+            first_id = cursor.lastrowid - len(batch) + 1
+            for pk, obj in enumerate(batch, first_id):
+                obj.pk = pk
+                obj._state.adding = False
+                obj._state.db = using
+
+
+def resolve_slugs(items):
+    """Id категорий и жанров пакета по справочникам процесса."""
+    category_slugs = {
+        item['category'] for item in items if item.get('category')
+    }
+    genre_slugs = {slug for item in items for slug in item.get('genre', ())}
+    return (
+        references.categories.get_ids(category_slugs),
+        references.genres.get_ids(genre_slugs),
+    )
+
+
+def validate_items(data):
+    """Проверяет элементы пакета; возвращает (валидные, ошибки).
+
+    Сериализатор создается один на режим: копирование его полей
+    обходится дороже самой проверки элемента.
+    """
+    serializers = {
+        False: BulkTitleSerializer(),
+        True: BulkTitleSerializer(partial=True),
+    }
+    valid = []
+    errors = []
+    for index, item in enumerate(data):
+        serializer = serializers[isinstance(item, dict) and 'id' in item]
+        try:
+            valid.append((index, serializer.run_validation(item)))
+        except ValidationError as error:
+            errors.append({'index': index, 'errors': error.detail})
+    return valid, errors
+
+
+def check_references(valid, categories, genres, existing):
+    """Отсеивает элементы с неизвестными слагами или id и повторы id."""
+    checked = []
+    errors = []
+    seen = set()
+    for index, item in valid:
+        item_errors = {}
+        if 'id' in item and item['id'] not in existing:
+            item_errors['id'] = ['Произведение не найдено.']
+        elif 'id' in item and item['id'] in seen:
+            item_errors['id'] = ['Произведение уже есть в пакете.']
+        if 'id' in item:
+            seen.add(item['id'])
+        if 'category' in item and item['category'] not in categories:
+            item_errors['category'] = ['Категория не найдена.']
+        unknown = [
+            slug for slug in item.get('genre', ()) if slug not in genres
+        ]
+        if unknown:
+            item_errors['genre'] = [
+                f'Жанры не найдены: {", ".join(unknown)}.'
+            ]
+        if item_errors:
+            errors.append({'index': index, 'errors': item_errors})
+        else:
+            checked.append(item)
+    return checked, errors
+
+
+def apply_item(title, item, categories):
+    for field in ('name', 'year', 'description'):
+        if field in item:
+            setattr(title, field, item[field])
+    if 'category' in item:
+        title.category_id = categories[item['category']]
+    title.search_name = normalize_search_text(title.name)
+
+
+@write_atomic()
+def bulk_write_titles(data):
+    """Создает и обновляет произведения пакетом в одной транзакции.
+
+    Элементы с id обновляют существующие произведения, остальные
+    создаются. Ответ содержит id записанных произведений и ошибки по
+    индексам элементов; ошибочные элементы не записываются.
+    """
+    valid, errors = validate_items(data)
+    categories, genres = resolve_slugs([item for _, item in valid])
+    existing = Title.objects.in_bulk(
+        [item['id'] for _, item in valid if 'id' in item]
+    )
+    items, reference_errors = check_references(
+        valid, categories, genres, existing
+    )
+    errors = sorted(errors + reference_errors, key=lambda e: e['index'])
+
+    created = []
+    updated = []
+    for item in items:
+        title = existing[item['id']] if 'id' in item else Title()
+        apply_item(title, item, categories)
+        (updated if 'id' in item else created).append((title, item))
+
+    insert_with_ids(Title, [title for title, _ in created])
+    now = timezone.now()
+    for title, _ in updated:
+        title.updated_at = now
+    Title.objects.bulk_update(
+        [title for title, _ in updated],
+        ('name', 'year', 'description', 'category', 'search_name',
+         'updated_at'),
+        batch_size=BATCH_SIZE,
+    )
+    relinked = [title.pk for title, item in updated if 'genre' in item]
+    GenreTitle.objects.filter(title_id__in=relinked).delete()
+    GenreTitle.objects.bulk_create(
+        [
+            GenreTitle(title_id=title.pk, genre_id=genres[slug])
+            for title, item in created + updated
+            for slug in dict.fromkeys(item.get('genre', ()))
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    if created or updated:
+        bump_on_commit(Title._meta.label_lower)
+        bump_on_commit(GenreTitle._meta.label_lower)
+    for title, item in updated:
+        if 'name' in item:
+            # Отзывы показывают название произведения.
+            bump_on_commit(REVIEWS_OF_TITLE.format(title_id=title.pk))
+    return {
+        'created': [title.pk for title, _ in created],
+        'updated': [title.pk for title, _ in updated],
+        'errors': errors,
+    }
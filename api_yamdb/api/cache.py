@@ -0,0 +1,174 @@
+import hashlib
+import time
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+VERSION_KEY = 'version:{}'
+MODIFIED_KEY = 'modified:{}'
+RESPONSE_KEY = 'response:{}'
+
+
+def new_version():
+    """Штамп версии, который не повторяет ни один прежний.
+
+    Версии сравниваются только на равенство, поэтому штамп случайный, а
+    не счетчик: incr файлового кэша — чтение и запись без блокировки, и
+    при одновременной смене версии в двух процессах счетчик мог бы
+    вернуться к значению, под которым уже закэшированы старые ответы.
+    """
+    return uuid.uuid4().hex
+
+
+def get_versions(resources):
+    """Текущие версии ресурсов (по label_lower моделей)."""
+    keys = [VERSION_KEY.format(resource) for resource in resources]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    for key in missing:
+        # Вытесненная из кэша версия заменяется новым штампом.
+        cache.add(key, new_version(), timeout=None)
+    if missing:
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, 0) for key in keys]
+
+
+def get_last_modified(resources):
+    """Время последнего изменения ресурсов (unix-время в секундах)."""
+    keys = [MODIFIED_KEY.format(resource) for resource in resources]
+    stamps = cache.get_many(keys)
+    now = int(time.time())
+    for key in keys:
+        if key not in stamps:
+            cache.add(key, now, timeout=None)
+            stamps[key] = cache.get(key, now)
+    return max(stamps.values(), default=now)
+
+
+def bump_version(resource):
+    """Меняет версию ресурса, делая устаревшими зависимые ответы."""
+    cache.set(VERSION_KEY.format(resource), new_version(), timeout=None)
+    cache.set(MODIFIED_KEY.format(resource), int(time.time()), timeout=None)
+
+
+def get_query_signature(request):
+    """Query-параметры в каноническом порядке, page=1 равно его отсутствию."""
+    return urlencode(sorted(
+        (key, value)
+        for key in request.query_params
+        for value in request.query_params.getlist(key)
+        if not (key == 'page' and value == '1')
+    ))
+
+
+def get_or_set_versioned(name, signature, resources, compute):
+    """Значение compute() в кэше до смены версий ресурсов."""
+    raw = '|'.join((
+        name, signature, ':'.join(map(str, get_versions(resources)))
+    ))
+    return cache.get_or_set(
+        RESPONSE_KEY.format(hashlib.md5(raw.encode()).hexdigest()),
+        compute,
+        settings.RESPONSE_CACHE_TIMEOUT,
+    )
+
+
+class ResponseCacheMixin:
+    """Кэширует ответы анонимным пользователям до смены версий ресурсов.
+
+    Ключ строится из хоста, пути, нормализованных query-параметров и
+    версий всех ресурсов из cache_resources, поэтому запись в любой из
+    них делает старые записи недостижимыми без явного удаления.
+    """
+
+    cache_resources = ()
+    cache_timeout = settings.RESPONSE_CACHE_TIMEOUT
+
+    def get_response_cache_key(self, request):
+        versions = get_versions(self.cache_resources)
+        raw = '|'.join((
+            request.get_host(),
+            request.path,
+            get_query_signature(request),
+            ':'.join(map(str, versions)),
+        ))
+        return RESPONSE_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if not request.user.is_anonymous:
+            return handler(request, *args, **kwargs)
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            return Response(cached)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, self.cache_timeout)
+        return response
+
+
+class CachedListMixin(ResponseCacheMixin):
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class CachedRetrieveMixin(ResponseCacheMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin:
+    """ETag и Last-Modified для list/retrieve по штампам коллекций.
+
+    conditional_resources — шаблоны имен ресурсов, подставляемые из
+    kwargs URL. Штампы читаются только из кэша, поэтому 304 отдается до
+    запросов к базе и сериализации.
+    """
+
+    conditional_resources = ()
+
+    def get_conditional_resources(self):
+        return [
+            resource.format(**self.kwargs)
+            for resource in self.conditional_resources
+        ]
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        resources = self.get_conditional_resources()
+        raw = '|'.join((
+            request.get_host(),
+            request.path,
+            get_query_signature(request),
+            request.accepted_renderer.format,
+            ':'.join(map(str, get_versions(resources))),
+        ))
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        last_modified = get_last_modified(resources)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
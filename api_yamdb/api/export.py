@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.middleware.gzip import re_accepts_gzip
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+
+from reviews.models import Comment, Review
+
+REVIEW_FIELDS = (
+    'id', 'author__username', 'score', 'text', 'pub_date',
+    'comment_count', 'last_comment_at',
+)
+COMMENT_FIELDS = ('id', 'review_id', 'author__username', 'text', 'pub_date')
+
+
+def export_reviews(title_id, after=0):
+    """Видимые отзывы произведения по возрастанию id, начиная после after."""
+    return Review.objects.filter(
+        title_id=title_id, is_hidden=False, pk__gt=after
+    ).order_by('pk').values(*REVIEW_FIELDS)
+
+
+def export_comments(title_id, after=0):
+    """Видимые комментарии к видимым отзывам произведения после after."""
+    return Comment.objects.filter(
+        review__title_id=title_id,
+        review__is_hidden=False,
+        is_hidden=False,
+        pk__gt=after,
+    ).order_by('pk').values(*COMMENT_FIELDS)
+
+
+def iterate_ndjson(queryset, chunk_size):
+    """Строки NDJSON; в памяти держится не больше chunk_size строк."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in queryset.iterator(chunk_size=chunk_size):
+        row['author'] = row.pop('author__username')
+        yield (encoder.encode(row) + '\n').encode()
+
+
+def ndjson_response(request, queryset):
+    """Потоковый ответ NDJSON, сжатый gzip, если клиент его принимает.
+
+    Строки идут по возрастанию id: прерванную выгрузку можно продолжить
+    с ?after=<id последней полученной строки>.
+    """
+    content = iterate_ndjson(queryset, settings.EXPORT_CHUNK_SIZE)
+    accepts_gzip = re_accepts_gzip.search(
+        request.META.get('HTTP_ACCEPT_ENCODING', '')
+    )
+    if accepts_gzip:
+        content = compress_sequence(content)
+    response = StreamingHttpResponse(
+        content, content_type='application/x-ndjson; charset=utf-8'
+    )
+    if accepts_gzip:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,49 @@
+from django.db.models import Count
+
+from reviews.models import GenreTitle, Title
+
+
+def get_title_facets(titles):
+    """Считает произведения по жанрам, категориям и годам.
+
+    titles — отфильтрованный queryset; он используется как подзапрос
+    по id, поэтому каждый срез — один сгруппированный запрос.
+    """
+    ids = titles.order_by().values('pk')
+    genres = (
+        GenreTitle.objects.filter(title__in=ids, genre__isnull=False)
+        .values('genre__slug', 'genre__name')
+        .annotate(count=Count('title', distinct=True))
+        .order_by('-count', 'genre__name')
+    )
+    categories = (
+        Title.objects.filter(pk__in=ids, category__isnull=False)
+        .values('category__slug', 'category__name')
+        .annotate(count=Count('pk'))
+        .order_by('-count', 'category__name')
+    )
+    years = (
+        Title.objects.filter(pk__in=ids)
+        .values('year')
+        .annotate(count=Count('pk'))
+        .order_by('-year')
+    )
+    return {
+        'genre': [
+            {
+                'slug': row['genre__slug'],
+                'name': row['genre__name'],
+                'count': row['count'],
+            }
+            for row in genres
+        ],
+        'category': [
+            {
+                'slug': row['category__slug'],
+                'name': row['category__name'],
+                'count': row['count'],
+            }
+            for row in categories
+        ],
+        'year': list(years),
+    }
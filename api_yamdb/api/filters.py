@@ -1,18 +1,59 @@
+from django.db import router
+from django.db.models import Count
 from django_filters import rest_framework as filters
 
-from reviews.models import Title
+from reviews.models import Comment, GenreTitle, Review, Title
+from reviews.search import (
+    build_match_query,
+    build_text_match_query,
+    has_search_index,
+    normalize_search_text,
+    snippet,
+)
+
+# Допустимые сортировки: у каждой есть составной индекс, последним полем
+# которого идет id, поэтому порядок стабилен, а страница читается по
+# индексу без сортировки всего каталога.
+TITLE_ORDERINGS = {
+    "rating": ("rating", "id"),
+    "-rating": ("-rating", "-id"),
+    "review_count": ("review_count", "id"),
+    "-review_count": ("-review_count", "-id"),
+    "year": ("year", "id"),
+    "-year": ("-year", "-id"),
+    "name": ("name", "id"),
+    "-name": ("-name", "-id"),
+}
+# Отзывы и комментарии: от старых к новым и от новых к старым, по
+# индексам (title_id, pub_date, id) и (review_id, pub_date, id).
+PUB_DATE_ORDERINGS = {
+    "pub_date": ("pub_date", "id"),
+    "-pub_date": ("-pub_date", "-id"),
+}
+# Самые обсуждаемые отзывы: индексы (title_id, comment_count, id) и
+# (title_id, last_comment_at, id).
+REVIEW_ORDERINGS = {
+    **PUB_DATE_ORDERINGS,
+    "-comment_count": ("-comment_count", "-id"),
+    "-last_comment_at": ("-last_comment_at", "-id"),
+}
 
 
 class TitleFilter(filters.FilterSet):
     """Фильтр произведений по определенным полям."""
 
     name = filters.CharFilter(
-        field_name="name",
-        lookup_expr="contains"
+        method="filter_name"
+    )
+    search = filters.CharFilter(
+        method="filter_search"
     )
     genre = filters.CharFilter(
-        field_name="genre__slug",
-        lookup_expr="exact"
+        method="filter_genre"
+    )
+    mode = filters.ChoiceFilter(
+        choices=(("any", "any"), ("all", "all")),
+        method="filter_mode"
     )
     category = filters.CharFilter(
         field_name="category__slug",
@@ -22,7 +63,134 @@ class TitleFilter(filters.FilterSet):
         field_name="year",
         lookup_expr="exact"
     )
+    ordering = filters.ChoiceFilter(
+        choices=[(value, value) for value in TITLE_ORDERINGS],
+        method="filter_ordering"
+    )
 
     class Meta:
         model = Title
-        fields = ("name", "year", "genre", "category")
+        fields = (
+            "name", "search", "year", "genre", "mode", "category", "ordering"
+        )
+
+    def filter_name(self, queryset, name, value):
+        """Подстрока названия без учета регистра, в том числе кириллицы."""
+        return queryset.filter(
+            search_name__contains=normalize_search_text(value)
+        )
+
+    def filter_genre(self, queryset, name, value):
+        """Жанры через запятую: mode=any (по умолчанию) или mode=all.
+
+        Отбор идет подзапросом по reviews_genretitle, а не JOIN, поэтому
+        произведение с несколькими подходящими жанрами не дублируется.
+        """
+        slugs = {slug.strip() for slug in value.split(",") if slug.strip()}
+        if not slugs:
+            return queryset
+        links = GenreTitle.objects.filter(genre__slug__in=slugs)
+        if self.form.cleaned_data.get("mode") == "all":
+            links = (
+                links.order_by().values("title_id")
+                .annotate(genres=Count("genre_id"))
+                .filter(genres=len(slugs))
+            )
+        return queryset.filter(pk__in=links.values("title_id"))
+
+    def filter_mode(self, queryset, name, value):
+        """Режим учитывается в filter_genre."""
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию с сортировкой по релевантности.
+
+        Каждое слово запроса ищется как префикс слова в названии.
+        """
+        query = build_match_query(value)
+        if not query:
+            return queryset
+        if not has_search_index(router.db_for_read(Title)):
+            for word in normalize_search_text(value).split():
+                queryset = queryset.filter(search_name__contains=word)
+            return queryset
+        return queryset.filter(
+            search__search_name__match=query
+        ).order_by("search__rank")
+
+    def filter_ordering(self, queryset, name, value):
+        """Сортировка только по индексированным полям.
+
+        Произведения без отзывов не имеют рейтинга и в сортировку по
+        рейтингу не попадают, как и в рейтинг лучших.
+        """
+        if value.lstrip("-") == "rating":
+            queryset = queryset.filter(rating__isnull=False)
+        return queryset.order_by(*TITLE_ORDERINGS[value])
+
+
+class TextSearchFilter(filters.FilterSet):
+    """Полнотекстовый поиск по тексту отзывов или комментариев."""
+
+    search = filters.CharFilter(
+        method="filter_search"
+    )
+
+    def filter_search(self, queryset, name, value):
+        """Совпадения сортируются по релевантности, в поле snippet —
+        отрывок текста с подсвеченными словами запроса.
+
+        Явная сортировка ?ordering= применяется после поиска и заменяет
+        сортировку по релевантности.
+        """
+        query = build_text_match_query(value)
+        if not query:
+            return queryset
+        if not has_search_index(router.db_for_read(queryset.model)):
+            for word in value.split():
+                queryset = queryset.filter(text__icontains=word)
+            return queryset
+        index = queryset.model._meta.get_field("search").related_model
+        return queryset.filter(search__text__match=query).annotate(
+            snippet=snippet(index._meta.db_table)
+        ).order_by("search__rank")
+
+
+class PubDateOrderingFilter(filters.FilterSet):
+    """Сортировка вложенного списка по дате публикации."""
+
+    ordering = filters.ChoiceFilter(
+        choices=[(value, value) for value in PUB_DATE_ORDERINGS],
+        method="filter_ordering"
+    )
+
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by(*PUB_DATE_ORDERINGS[value])
+
+
+class ReviewFilter(TextSearchFilter):
+    """Поиск по тексту отзывов и их сортировка по дате или по
+    активности обсуждения."""
+
+    ordering = filters.ChoiceFilter(
+        choices=[(value, value) for value in REVIEW_ORDERINGS],
+        method="filter_ordering"
+    )
+
+    class Meta:
+        model = Review
+        fields = ("search", "ordering")
+
+    def filter_ordering(self, queryset, name, value):
+        """Отзывы без комментариев не имеют даты последнего из них и в
+        сортировку по ней не попадают, как произведения без отзывов в
+        сортировку по рейтингу."""
+        if value == "-last_comment_at":
+            queryset = queryset.filter(last_comment_at__isnull=False)
+        return queryset.order_by(*REVIEW_ORDERINGS[value])
+
+
+class CommentFilter(TextSearchFilter, PubDateOrderingFilter):
+    class Meta:
+        model = Comment
+        fields = ("search", "ordering")
@@ -0,0 +1,144 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
+from rest_framework import serializers
+
+
+def get_model_field(model, source):
+    """Возвращает поле модели по source поля сериализатора или None."""
+    if '.' in source:
+        return None
+    try:
+        return model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return None
+
+
+def get_related_loading(field, model, prefix=''):
+    """Загрузка связанной модели, нужная полю-связи сериализатора."""
+    if isinstance(field, serializers.ManyRelatedField):
+        field = field.child_relation
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    if isinstance(field, serializers.BaseSerializer):
+        return collect_eager_loading(field, model, prefix)
+    if isinstance(field, serializers.SlugRelatedField):
+        model_field = get_model_field(model, field.slug_field)
+        if model_field is not None and not model_field.is_relation:
+            return (
+                {prefix + model._meta.pk.name, prefix + model_field.name},
+                [],
+                [],
+            )
+    return None, [], []
+
+
+def get_prefetch(field, model_field, path):
+    """Prefetch для обратной связи или many-to-many с урезанным queryset."""
+    related_model = model_field.related_model
+    only, select, prefetch = get_related_loading(field, related_model)
+    queryset = related_model._default_manager.all()
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if only is not None:
+        if model_field.one_to_many:
+            only.add(model_field.field.name)
+        queryset = queryset.only(*only)
+    return Prefetch(path, queryset=queryset)
+
+
+def collect_eager_loading(serializer, model, prefix=''):
+    """Разбирает дерево полей сериализатора.
+
+    Возвращает кортеж (only, select_related, prefetch_related). Если
+    какое-то поле нельзя свести к колонкам модели, only равен None и
+    модель загружается целиком.
+    """
+    only = {prefix + model._meta.pk.name}
+    select = []
+    prefetch = []
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        model_field = get_model_field(model, field.source)
+        if model_field is None:
+            only = None
+            continue
+        path = prefix + model_field.name
+        if model_field.many_to_many or model_field.one_to_many:
+            prefetch.append(get_prefetch(field, model_field, path))
+            continue
+        if only is not None and model_field.concrete:
+            only.add(path)
+        if not model_field.is_relation or (
+            isinstance(field, serializers.RelatedField)
+            and field.use_pk_only_optimization()
+        ):
+            # Полю-связи хватает значения внешнего ключа.
+            continue
+        related_only, related_select, related_prefetch = get_related_loading(
+            field, model_field.related_model, path + '__'
+        )
+        select.append(path)
+        select.extend(related_select)
+        prefetch.extend(related_prefetch)
+        if only is not None and related_only is not None:
+            only.update(related_only)
+    return only, select, prefetch
+
+
+def eager_load(queryset, serializer):
+    """Добавляет к queryset загрузку всего, что прочитает сериализатор."""
+    only, select, prefetch = collect_eager_loading(serializer, queryset.model)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if only is not None:
+        # Связанный менеджер (title.reviews) проставляет родителя каждому
+        # объекту, поэтому его внешний ключ нельзя откладывать.
+        only.update(
+            field.name for field in queryset._known_related_objects
+        )
+        queryset = queryset.only(*only)
+    return queryset
+
+
+class EagerLoadingMixin:
+    """Подгружает связанные объекты по полям сериализатора вьюсета.
+
+    select_related/prefetch_related и only() строятся из дерева полей,
+    поэтому список выполняет фиксированное число запросов.
+    """
+
+    def get_eager_loading_serializer(self):
+        return self.get_serializer_class()(
+            context=self.get_serializer_context()
+        )
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return eager_load(queryset, self.get_eager_loading_serializer())
+
+
+class ParentObjectsMixin:
+    """Родительские объекты из kwargs URL, загружаемые раз за запрос.
+
+    parent_lookups — имя родителя → (модель или queryset,
+    {поле модели: kwarg URL}).
+    Вьюсет создается на каждый запрос, поэтому объекты, запомненные в
+    нем, видят и сериализатор (через context['view']), и разрешения.
+    """
+
+    parent_lookups = {}
+
+    def get_parent(self, name):
+        parents = self.__dict__.setdefault('_parents', {})
+        if name not in parents:
+            model, lookups = self.parent_lookups[name]
+            parents[name] = get_object_or_404(model, **{
+                field: self.kwargs[kwarg] for field, kwarg in lookups.items()
+            })
+        return parents[name]
@@ -0,0 +1,120 @@
+import json
+
+from django.db import router
+from django.utils import timezone
+
+from reviews.models import Comment, Review, Title, TitleScore
+from reviews.search import write_atomic
+from .signals import COMMENTS_OF_REVIEW, REVIEWS_OF_TITLE, bump_on_commit
+
+DELETE = 'delete'
+HIDE = 'hide'
+
+
+def select_for_moderation(model, data):
+    """Отзывы или комментарии, подходящие под фильтры модерации."""
+    queryset = model.objects.all()
+    if 'ids' in data:
+        queryset = queryset.filter(pk__in=data['ids'])
+    if 'author' in data:
+        queryset = queryset.filter(author__username=data['author'])
+    if 'title' in data:
+        title_lookup = 'title_id' if model is Review else 'review__title_id'
+        queryset = queryset.filter(**{title_lookup: data['title']})
+    if 'since' in data:
+        queryset = queryset.filter(pub_date__gte=data['since'])
+    if 'until' in data:
+        queryset = queryset.filter(pub_date__lt=data['until'])
+    if data['action'] == HIDE:
+        queryset = queryset.filter(is_hidden=False)
+    return queryset
+
+
+def iterate_batches(queryset, fields, batch_size):
+    """Строки (pk, *fields) порциями по возрастанию pk.
+
+    Каждая порция выбирается заново после обработки предыдущей, поэтому
+    удаленные и скрытые строки в следующую порцию не попадают.
+    """
+    last = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last).order_by('pk')
+            .values_list('pk', *fields)[:batch_size]
+        )
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def raw_delete(queryset):
+    """DELETE одним запросом, без сборщика каскада и сигналов.
+
+    Каскад и версии кэша обрабатывает вызывающий код.
+    """
+    return queryset._raw_delete(router.db_for_write(queryset.model))
+
+
+def moderate_reviews(queryset, action, batch_size):
+    """Удаляет или скрывает отзывы порциями, отдавая прогресс.
+
+    Рейтинги и гистограммы затронутых произведений пересчитываются
+    запросами по множеству, по одному на порцию.
+    """
+    processed = 0
+    for rows in iterate_batches(queryset, ('title_id',), batch_size):
+        ids = [pk for pk, _ in rows]
+        titles = {title_id for _, title_id in rows}
+        with write_atomic():
+            reviews = Review.objects.filter(pk__in=ids)
+            if action == DELETE:
+                raw_delete(Comment.objects.filter(review__in=ids))
+                raw_delete(reviews)
+            else:
+                reviews.update(is_hidden=True, updated_at=timezone.now())
+            Title.recalculate_ratings(titles)
+            TitleScore.rebuild(titles=titles)
+            bump_on_commit(Review._meta.label_lower)
+            bump_on_commit(Title._meta.label_lower)
+            for title_id in titles:
+                bump_on_commit(REVIEWS_OF_TITLE.format(title_id=title_id))
+            for review_id in ids:
+                bump_on_commit(COMMENTS_OF_REVIEW.format(review_id=review_id))
+        processed += len(ids)
+        yield {'processed': processed}
+
+
+def moderate_comments(queryset, action, batch_size):
+    """Удаляет или скрывает комментарии порциями, отдавая прогресс.
+
+    Счетчики комментариев затронутых отзывов пересчитываются одним
+    UPDATE на порцию.
+    """
+    processed = 0
+    fields = ('review_id', 'review__title_id')
+    for rows in iterate_batches(queryset, fields, batch_size):
+        ids = [pk for pk, _, _ in rows]
+        reviews = {review_id for _, review_id, _ in rows}
+        with write_atomic():
+            comments = Comment.objects.filter(pk__in=ids)
+            if action == DELETE:
+                raw_delete(comments)
+            else:
+                comments.update(is_hidden=True, updated_at=timezone.now())
+            Review.recalculate_comments(reviews)
+            for review_id in reviews:
+                bump_on_commit(COMMENTS_OF_REVIEW.format(review_id=review_id))
+            for title_id in {title_id for _, _, title_id in rows}:
+                bump_on_commit(REVIEWS_OF_TITLE.format(title_id=title_id))
+        processed += len(ids)
+        yield {'processed': processed}
+
+
+def stream_progress(progress):
+    """Строки NDJSON: прогресс после каждой порции и итог."""
+    processed = 0
+    for batch, state in enumerate(progress, 1):
+        processed = state['processed']
+        yield json.dumps({'batch': batch, 'processed': processed}) + '\n'
+    yield json.dumps({'done': True, 'processed': processed}) + '\n'
@@ -0,0 +1,216 @@
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .filters import PUB_DATE_ORDERINGS, REVIEW_ORDERINGS, TITLE_ORDERINGS
+
+
+class KeysetPagination(BasePagination):
+    """Keyset-пагинация: страница выбирается условием по ключу сортировки.
+
+    Курсор хранит значения полей ordering последнего (или первого) объекта
+    страницы, поэтому стоимость любой страницы одинакова: нет ни OFFSET,
+    ни COUNT(*). Последним полем ordering должен быть уникальный ключ.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Некорректный курсор.'
+    ordering = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.fields = [
+            queryset.model._meta.get_field(name.lstrip('-'))
+            for name in self.ordering
+        ]
+        position, reverse = self.decode_cursor(request)
+        loaded, deferred = queryset.query.deferred_loading
+        if loaded and not deferred:
+            # Значения ключа нужны для курсора: only() не должен их
+            # откладывать, иначе каждое чтение стоит отдельного запроса.
+            queryset = queryset.only(*loaded, *(
+                field.name for field in self.fields
+            ))
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self.invert(name) for name in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(
+                ordering, position
+            ))
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.next_position = self.previous_position = None
+        if results:
+            has_next = position is not None if reverse else has_more
+            has_previous = has_more if reverse else position is not None
+            if has_next:
+                self.next_position = self.get_position(results[-1])
+            if has_previous:
+                self.previous_position = self.get_position(results[0])
+        return results
+
+    @staticmethod
+    def invert(name):
+        return name[1:] if name.startswith('-') else '-' + name
+
+    def get_keyset_filter(self, ordering, position):
+        """Условие «строго после position» для составного ключа.
+
+        Ведущее поле дополнительно ограничено нестрогим неравенством,
+        чтобы база могла начать с диапазона по составному индексу.
+        """
+        conditions = []
+        for index, name in enumerate(ordering):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition = Q(**{
+                f'{name.lstrip("-")}__{lookup}': position[index]
+            })
+            for previous, value in zip(ordering[:index], position):
+                condition &= Q(**{previous.lstrip('-'): value})
+            conditions.append(condition)
+        leading = ordering[0]
+        lookup = 'lte' if leading.startswith('-') else 'gte'
+        return Q(**{
+            f'{leading.lstrip("-")}__{lookup}': position[0]
+        }) & reduce(or_, conditions)
+
+    def get_position(self, instance):
+        return [
+            field.value_to_string(instance) for field in self.fields
+        ]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            data = json.loads(
+                base64.urlsafe_b64decode(encoded.encode('ascii'))
+            )
+            if len(data['p']) != len(self.fields):
+                raise ValueError(encoded)
+            position = [
+                field.to_python(value)
+                for field, value in zip(self.fields, data['p'])
+            ]
+            return position, bool(data['r'])
+        except (
+            binascii.Error, KeyError, TypeError, ValueError, ValidationError
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        data = json.dumps({'p': position, 'r': int(reverse)})
+        encoded = base64.urlsafe_b64encode(data.encode('utf-8'))
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded.decode('ascii')
+        )
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class KeysetOrPageNumberPagination(BasePagination):
+    """Номера страниц по умолчанию, keyset при ?pagination=cursor.
+
+    Переход по ссылке next/previous keyset-режима тоже остается в нем,
+    так как ссылка содержит параметр cursor.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    keyset_class = KeysetPagination
+    page_number_class = PageNumberPagination
+
+    def is_cursor_mode(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.cursor_mode
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.paginator = self.keyset_class()
+        else:
+            self.paginator = self.page_number_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+
+class OrderingKeysetPagination(KeysetPagination):
+    """Keyset-пагинация с сортировкой из ?ordering= по словарю orderings."""
+
+    orderings = {}
+    ordering_query_param = 'ordering'
+
+    def get_ordering(self, request, queryset, view):
+        return self.orderings.get(
+            request.query_params.get(self.ordering_query_param),
+            self.ordering,
+        )
+
+
+class TitleKeysetPagination(OrderingKeysetPagination):
+    ordering = ('-year', 'name', 'id')
+    orderings = TITLE_ORDERINGS
+
+
+class TitlePagination(KeysetOrPageNumberPagination):
+    keyset_class = TitleKeysetPagination
+
+
+class PubDateKeysetPagination(OrderingKeysetPagination):
+    ordering = PUB_DATE_ORDERINGS['pub_date']
+    orderings = PUB_DATE_ORDERINGS
+
+
+class PubDatePagination(KeysetOrPageNumberPagination):
+    keyset_class = PubDateKeysetPagination
+
+
+class ReviewKeysetPagination(PubDateKeysetPagination):
+    orderings = REVIEW_ORDERINGS
+
+
+class ReviewPagination(KeysetOrPageNumberPagination):
+    keyset_class = ReviewKeysetPagination
@@ -48,3 +48,14 @@ class IsAuthorOrModerOrAdmin(permissions.BasePermission):
                 or (request.user.is_user and request.user == obj.author)
             )
         )
+
+
+class ModeratorOrAdmin(permissions.BasePermission):
+    """Массовая модерация отзывов и комментариев."""
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (
+            request.user.is_admin
+            or request.user.is_moderator
+            or request.user.is_superuser
+        )
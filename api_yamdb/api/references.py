@@ -0,0 +1,101 @@
+import threading
+
+from rest_framework.response import Response
+
+from reviews.models import Category, Genre
+from .cache import get_versions
+
+
+class ReferenceCache:
+    """Справочник (slug → id, name) в памяти процесса.
+
+    Таблица перечитывается целиком, когда меняется ее версия в общем
+    кэше; версию поднимают сигналы сохранения и удаления, поэтому
+    после записи в любом процессе остальные процессы перечитают
+    справочник при следующем обращении. Объекты справочника общие для
+    всех запросов и не должны изменяться.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.resource = model._meta.label_lower
+        self.lock = threading.Lock()
+        self.version = None
+        self.ordered = []
+        self.by_slug = {}
+        self.by_pk = {}
+
+    def __deepcopy__(self, memo):
+        # Поля сериализаторов копируются вместе с аргументами, а
+        # справочник должен оставаться общим на процесс.
+        return self
+
+    def refresh(self):
+        version, = get_versions((self.resource,))
+        if version == self.version:
+            return
+        with self.lock:
+            if version == self.version:
+                return
+            # Версия читается до таблицы: запись, закоммиченная между
+            # ними, поднимет версию еще раз, и справочник перечитается.
+            ordered = list(
+                self.model.objects.order_by('name', 'pk')
+                .only('pk', 'name', 'slug')
+            )
+            self.ordered = ordered
+            self.by_slug = {obj.slug: obj for obj in ordered}
+            self.by_pk = {obj.pk: obj for obj in ordered}
+            self.version = version
+
+    def all(self):
+        self.refresh()
+        return self.ordered
+
+    def get(self, slug):
+        self.refresh()
+        return self.by_slug.get(slug)
+
+    def get_ids(self, slugs):
+        """Словарь slug → id для известных справочнику слагов."""
+        self.refresh()
+        return {
+            slug: self.by_slug[slug].pk
+            for slug in slugs if slug in self.by_slug
+        }
+
+    def get_by_pk(self, pk):
+        self.refresh()
+        return self.by_pk.get(pk)
+
+
+class ReferenceListMixin:
+    """Отдает список справочника из памяти процесса.
+
+    Поиск (?search=) по-прежнему выполняется в базе.
+    """
+
+    reference = None
+
+    def list(self, request, *args, **kwargs):
+        if any(
+            name in request.query_params
+            for name in self.get_reference_bypass_params()
+        ):
+            return super().list(request, *args, **kwargs)
+        objects = self.reference.all()
+        page = self.paginate_queryset(objects)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return Response(self.get_serializer(objects, many=True).data)
+
+    def get_reference_bypass_params(self):
+        return [
+            getattr(backend, 'search_param', None)
+            for backend in self.filter_backends
+        ]
+
+
+genres = ReferenceCache(Genre)
+categories = ReferenceCache(Category)
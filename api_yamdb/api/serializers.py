@@ -1,5 +1,6 @@
-from django.shortcuts import get_object_or_404
 from django.conf import settings
+from django.utils import timezone
+from django.utils.encoding import smart_str
 
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
@@ -8,6 +9,48 @@ from rest_framework.serializers import ModelSerializer
 
 from api_yamdb.validators import validate_username
 from reviews.models import Category, Comment, Genre, Review, Title, User
+from .references import categories, genres
+
+
+class SparseFieldsetMixin:
+    """Урезает поля ответа по ?fields= и ?omit= в GET-запросах.
+
+    Урезанный набор полей видит и EagerLoadingMixin, поэтому
+    невостребованные колонки и связи не загружаются из базы.
+    """
+
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+
+    def get_requested_names(self, request, param, fields):
+        value = request.query_params.get(param)
+        if value is None:
+            return None
+        names = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = names - set(fields)
+        if unknown:
+            raise ValidationError({
+                param: f'Неизвестные поля: {", ".join(sorted(unknown))}.'
+            })
+        return names
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return fields
+        only = self.get_requested_names(
+            request, self.fields_query_param, fields
+        )
+        omit = self.get_requested_names(
+            request, self.omit_query_param, fields
+        )
+        for name in list(fields):
+            if (only is not None and name not in only) or (
+                omit is not None and name in omit
+            ):
+                del fields[name]
+        return fields
 
 
 class SignupSerializer(serializers.ModelSerializer):
@@ -45,71 +88,221 @@ class GenreSerializer(ModelSerializer):
         model = Genre
 
 
+class ReferenceSlugRelatedField(SlugRelatedField):
+    """SlugRelatedField, который разрешает слаги по справочнику процесса.
+
+    Запись и чтение связи обходятся без запросов к справочной таблице:
+    для ответа достаточно id из внешнего ключа.
+    """
+
+    def __init__(self, reference, **kwargs):
+        self.reference = reference
+        kwargs.setdefault('queryset', reference.model.objects.all())
+        super().__init__(slug_field='slug', **kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        obj = self.reference.get(data)
+        if obj is None:
+            self.fail(
+                'does_not_exist',
+                slug_name=self.slug_field,
+                value=smart_str(data),
+            )
+        return obj
+
+    def use_pk_only_optimization(self):
+        return True
+
+    def to_representation(self, value):
+        obj = self.reference.get_by_pk(value.pk)
+        if obj is None:
+            # Объект создан после загрузки справочника в этой же транзакции.
+            obj = self.reference.model.objects.get(pk=value.pk)
+        return obj.slug
+
+
 class TitleSerializer(ModelSerializer):
-    genre = SlugRelatedField(
-        many=True,
-        slug_field='slug',
-        queryset=Genre.objects.all()
-    )
-    category = SlugRelatedField(
-        slug_field='slug',
-        queryset=Category.objects.all()
-    )
+    genre = ReferenceSlugRelatedField(genres, many=True)
+    category = ReferenceSlugRelatedField(categories)
 
     class Meta:
-        fields = '__all__'
+        fields = ('id', 'name', 'year', 'description', 'genre', 'category')
         model = Title
 
 
-class GenreTitleSerializer(ModelSerializer):
+class BulkTitleSerializer(serializers.Serializer):
+    """Элемент пакетной записи произведений.
+
+    Слаги проверяются только по формату: существование категорий и
+    жанров проверяется для всего пакета сразу.
+    """
+
+    id = serializers.IntegerField(required=False)
+    name = serializers.CharField(max_length=settings.LEN_NAME)
+    year = serializers.IntegerField(min_value=0)
+    description = serializers.CharField(
+        required=False, allow_blank=True, allow_null=True
+    )
+    genre = serializers.ListField(
+        child=serializers.SlugField(max_length=settings.LEN_SLUG)
+    )
+    category = serializers.SlugField(max_length=settings.LEN_SLUG)
+
+    def validate_year(self, value):
+        if value > timezone.now().year:
+            raise ValidationError(f'Год {value} больше текущего!')
+        return value
+
+
+class GenreTitleSerializer(SparseFieldsetMixin, ModelSerializer):
     genre = GenreSerializer(many=True, read_only=True)
     category = CategorySerializer(read_only=True)
     rating = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id', 'name', 'year', 'rating', 'description', 'genre', 'category'
+        )
+
+
+class EmbeddedReviewSerializer(serializers.ModelSerializer):
+    """Отзыв внутри ответа произведения (?expand=reviews)."""
+
+    author = serializers.SlugRelatedField(
+        slug_field='username', read_only=True
+    )
+
+    class Meta:
+        fields = ('id', 'author', 'text', 'score', 'pub_date')
+        model = Review
+
+
+class ScoreHistogramField(serializers.Field):
+    """Гистограмма оценок: список из LEN_RATING счетчиков, с оценки 1."""
 
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
 
-class ReviewSerializer(serializers.ModelSerializer):
+    def to_representation(self, value):
+        histogram = [0] * settings.LEN_RATING
+        for counter in value.all():
+            histogram[counter.score - 1] = counter.count
+        return histogram
+
+
+class TitleDetailSerializer(GenreTitleSerializer):
+    """Произведение с последними отзывами, если вьюсет их загрузил."""
+
+    scores = ScoreHistogramField()
+
+    class Meta(GenreTitleSerializer.Meta):
+        fields = GenreTitleSerializer.Meta.fields + ('scores',)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        reviews = getattr(instance, 'latest_reviews', None)
+        if reviews is not None:
+            data['reviews'] = EmbeddedReviewSerializer(
+                reviews, many=True, context=self.context
+            ).data
+        return data
+
+
+class SimilarTitleSerializer(GenreTitleSerializer):
+    similarity = serializers.FloatField(read_only=True)
+
+    class Meta(GenreTitleSerializer.Meta):
+        fields = GenreTitleSerializer.Meta.fields + ('similarity',)
+
+
+class RecommendedTitleSerializer(GenreTitleSerializer):
+    predicted_score = serializers.FloatField(read_only=True)
+
+    class Meta(GenreTitleSerializer.Meta):
+        fields = GenreTitleSerializer.Meta.fields + ('predicted_score',)
+
+
+class LeaderboardTitleSerializer(GenreTitleSerializer):
+    weighted_rating = serializers.FloatField(read_only=True)
+
+    class Meta(GenreTitleSerializer.Meta):
+        fields = GenreTitleSerializer.Meta.fields + ('weighted_rating',)
+
+
+class EditedFieldsMixin:
+    """update() пишет только поля из запроса и updated_at.
+
+    Объект загружен до транзакции записи, поэтому полное сохранение
+    вернуло бы счетчики и флаг модерации, измененные после загрузки.
+    """
+
+    def update(self, instance, validated_data):
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
+
+class ReviewSerializer(EditedFieldsMixin, SparseFieldsetMixin,
+                       serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username', read_only=True
     )
     title = serializers.SlugRelatedField(
         slug_field='name', read_only=True,
     )
+    # Только в результатах ?search=.
+    snippet = serializers.CharField(read_only=True)
 
     class Meta:
-        fields = '__all__'
-        model = Review
-
-    def validate(self, attrs):
-        title_id = (
-            self.context['request'].parser_context['kwargs']['title_id']
+        fields = (
+            'id', 'author', 'title', 'text', 'score', 'pub_date',
+            'comment_count', 'last_comment_at', 'snippet',
         )
-        title = get_object_or_404(Title, pk=title_id)
-        self.validate_title(title)
-        return super().validate(attrs)
-
-    # не будет вызываться автоматически, так как tilte не обозначено,
-    # как required, а read_only и required вместе не возможны у одного поля
-    def validate_title(self, value):
-        user = self.context['request'].user
-        if (
-            self.context['request'].method == 'POST'
-            and Review.objects.filter(author=user, title=value).exists()
-        ):
-            raise ValidationError(
-                'Возможен только один отзыв на произведение!'
-            )
-        return value
+        read_only_fields = ('comment_count', 'last_comment_at')
+        model = Review
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(EditedFieldsMixin, SparseFieldsetMixin,
+                        serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username', read_only=True
     )
 
+    snippet = serializers.CharField(read_only=True)
+
     class Meta:
-        exclude = ('review',)
+        fields = ('id', 'author', 'text', 'pub_date', 'snippet')
         model = Comment
+
+
+class ModerationSerializer(serializers.Serializer):
+    """Действие и фильтры массовой модерации; нужен хотя бы один фильтр."""
+
+    filters = ('ids', 'author', 'title', 'since', 'until')
+
+    action = serializers.ChoiceField(choices=('delete', 'hide'))
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=settings.MODERATION_IDS_LIMIT,
+    )
+    author = serializers.CharField(
+        required=False, max_length=settings.LEN_USERNAME
+    )
+    title = serializers.IntegerField(required=False, min_value=1)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if not any(name in attrs for name in self.filters):
+            raise ValidationError(
+                'Укажите хотя бы один фильтр: ' + ', '.join(self.filters)
+                + '.'
+            )
+        return attrs
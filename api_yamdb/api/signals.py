@@ -0,0 +1,53 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import (
+    Category, Comment, Genre, GenreTitle, Review, Title
+)
+from users.models import User
+from .cache import bump_version
+
+# Версия пользователей входит в ответы с именами авторов.
+VERSIONED_MODELS = (Category, Genre, GenreTitle, Review, Title, User)
+REVIEWS_OF_TITLE = 'reviews.review:title:{title_id}'
+COMMENTS_OF_REVIEW = 'reviews.comment:review:{review_id}'
+
+
+def bump_on_commit(resource):
+    transaction.on_commit(lambda: bump_version(resource))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_model_version(sender, **kwargs):
+    if sender in VERSIONED_MODELS:
+        bump_on_commit(sender._meta.label_lower)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_genre_title_version(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_on_commit(GenreTitle._meta.label_lower)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_title_reviews_version(sender, instance, **kwargs):
+    bump_on_commit(REVIEWS_OF_TITLE.format(title_id=instance.title_id))
+    if kwargs.get('created') is None:
+        # Удаленный отзыв делает его комментарии недоступными (404).
+        bump_on_commit(COMMENTS_OF_REVIEW.format(review_id=instance.pk))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def bump_reviews_of_title_version(sender, instance, **kwargs):
+    # Отзывы показывают название произведения.
+    bump_on_commit(REVIEWS_OF_TITLE.format(title_id=instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_review_comments_version(sender, instance, **kwargs):
+    bump_on_commit(COMMENTS_OF_REVIEW.format(review_id=instance.review_id))
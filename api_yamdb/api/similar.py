@@ -0,0 +1,276 @@
+import threading
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from reviews.models import GenreTitle, Title
+from .cache import get_versions
+
+SIMILAR_RESOURCES = ('reviews.title', 'reviews.genretitle', 'reviews.review')
+# Удаление категории или жанра обнуляет ссылки на них UPDATE без
+# updated_at и без сигналов: их смена перестраивает индекс целиком.
+REFERENCE_RESOURCES = ('reviews.category', 'reviews.genre')
+# Запись, начатая до синхронизации, может закоммититься после нее:
+# изменения за это окно перечитываются повторно.
+REFRESH_OVERLAP = timedelta(minutes=1)
+CHUNK_SIZE = 10_000
+WORD_BITS = 64
+# Под сходство в ключе отбора 32 бита: хватает на сумму весов до 16.
+SCORE_SCALE = np.float32(2 ** 28)
+
+
+class SimilarTitlesIndex:
+    """Произведения в массивах NumPy для поиска похожих.
+
+    ids — отсортированные id произведений, bits — битовая матрица
+    произведения × жанры (по WORD_BITS жанров в слове uint64),
+    genre_counts — число жанров в строке, categories и ratings —
+    категория (-1 без категории) и рейтинг (NaN без отзывов). Сходство с
+    произведением считается векторно по всем строкам сразу.
+    """
+
+    def __init__(self, ids, categories, ratings, genre_ids):
+        self.ids = ids
+        self.categories = categories
+        self.ratings = ratings
+        self.genre_ids = genre_ids
+        words = max(1, -(-len(genre_ids) // WORD_BITS))
+        self.bits = np.zeros((len(ids), words), dtype=np.uint64)
+        self.genre_counts = np.zeros(len(ids), dtype=np.uint16)
+
+    @classmethod
+    def from_rows(cls, rows, links, genre_ids):
+        """Индекс из строк (id, category_id, rating) и связей с жанрами."""
+        rows = sorted(rows)
+        index = cls(
+            np.array([row[0] for row in rows], dtype=np.int64),
+            np.array(
+                [-1 if row[1] is None else row[1] for row in rows],
+                dtype=np.int32,
+            ),
+            np.array(
+                [np.nan if row[2] is None else row[2] for row in rows],
+                dtype=np.float32,
+            ),
+            np.array(sorted(genre_ids), dtype=np.int64),
+        )
+        index.set_genres(links)
+        return index
+
+    @classmethod
+    def load(cls):
+        """Строит индекс по всей базе: два последовательных прохода."""
+        rows = Title.objects.order_by().values_list(
+            'pk', 'category_id', 'rating'
+        )
+        links = GenreTitle.objects.filter(
+            title__isnull=False, genre__isnull=False
+        ).order_by().values_list('title_id', 'genre_id')
+        links = list(links.iterator(chunk_size=CHUNK_SIZE))
+        return cls.from_rows(
+            rows.iterator(chunk_size=CHUNK_SIZE),
+            links,
+            {genre_id for _, genre_id in links},
+        )
+
+    def positions(self, title_ids):
+        """Строки title_ids в индексе; -1 для отсутствующих."""
+        title_ids = np.asarray(title_ids, dtype=np.int64)
+        positions = np.searchsorted(self.ids, title_ids)
+        found = positions < len(self.ids)
+        found[found] = self.ids[positions[found]] == title_ids[found]
+        return np.where(found, positions, -1)
+
+    def set_genres(self, links):
+        """Выставляет биты жанров по связям (title_id, genre_id)."""
+        if not links:
+            return
+        title_ids, genre_ids = np.array(links, dtype=np.int64).T
+        rows = self.positions(title_ids)
+        # Связи произведений, созданных после чтения строк, пропускаются.
+        known = rows >= 0
+        rows = rows[known]
+        columns = np.searchsorted(self.genre_ids, genre_ids[known])
+        np.bitwise_or.at(
+            self.bits,
+            (rows, columns // WORD_BITS),
+            np.left_shift(
+                np.uint64(1), (columns % WORD_BITS).astype(np.uint64)
+            ),
+        )
+        rows = np.unique(rows)
+        self.genre_counts[rows] = np.bitwise_count(self.bits[rows]).sum(
+            axis=1, dtype=np.uint16
+        )
+
+    def can_update(self, rows, links):
+        """Обновление на месте возможно без новых жанров и без вставки
+        произведений в середину отсортированных id."""
+        if not {genre_id for _, genre_id in links} <= set(
+            self.genre_ids.tolist()
+        ):
+            return False
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        new_ids = ids[self.positions(ids) < 0]
+        return not len(new_ids) or not len(self.ids) or (
+            new_ids.min() > self.ids[-1]
+        )
+
+    def update(self, rows, links):
+        """Перезаписывает строки измененных произведений, новые дописывает."""
+        rows = sorted(rows)
+        known = self.positions([row[0] for row in rows])
+        new_rows = [row for row, pos in zip(rows, known) if pos < 0]
+        if new_rows:
+            added = SimilarTitlesIndex.from_rows(new_rows, [], [])
+            self.ids = np.concatenate((self.ids, added.ids))
+            self.categories = np.concatenate(
+                (self.categories, added.categories)
+            )
+            self.ratings = np.concatenate((self.ratings, added.ratings))
+            self.bits = np.concatenate((
+                self.bits,
+                np.zeros((len(added.ids), self.bits.shape[1]), np.uint64),
+            ))
+            self.genre_counts = np.concatenate(
+                (self.genre_counts, added.genre_counts)
+            )
+        positions = self.positions([row[0] for row in rows])
+        self.categories[positions] = [
+            -1 if row[1] is None else row[1] for row in rows
+        ]
+        self.ratings[positions] = [
+            np.nan if row[2] is None else row[2] for row in rows
+        ]
+        self.bits[positions] = 0
+        self.genre_counts[positions] = 0
+        self.set_genres(links)
+
+    def similarity(self, position):
+        """Сходство всех произведений с произведением в строке position.
+
+        Взвешенная сумма коэффициента Жаккара по жанрам, совпадения
+        категории и близости рейтингов (0 без рейтинга у любого из двух).
+        Мощность объединения берется из genre_counts, поэтому по матрице
+        делается один проход.
+        """
+        bits = self.bits[position]
+        if self.bits.shape[1] == 1:
+            common = np.bitwise_count(self.bits[:, 0] & bits[0])
+        else:
+            common = np.bitwise_count(self.bits & bits).sum(
+                axis=1, dtype=np.uint16
+            )
+        union = self.genre_counts + self.genre_counts[position] - common
+        scores = common.astype(np.float32)
+        scores /= np.maximum(union, 1)
+        scores *= np.float32(settings.SIMILAR_GENRE_WEIGHT)
+        category = self.categories[position]
+        if category >= 0:
+            scores += np.float32(settings.SIMILAR_CATEGORY_WEIGHT) * (
+                self.categories == category
+            )
+        rating = self.ratings[position]
+        if not np.isnan(rating):
+            closeness = np.abs(self.ratings - rating)
+            closeness *= np.float32(-1 / (settings.LEN_RATING - 1))
+            closeness += np.float32(1)
+            # fmax заменяет NaN (произведения без рейтинга) нулем.
+            np.fmax(closeness, np.float32(0), out=closeness)
+            closeness *= np.float32(settings.SIMILAR_RATING_WEIGHT)
+            scores += closeness
+        return scores
+
+    def similar(self, title_id, limit):
+        """Не более limit пар (id, сходство) по убыванию сходства.
+
+        Сходство у многих произведений совпадает, а на повторах
+        argpartition вырождается, поэтому отбор идет по уникальным
+        ключам uint64: сходство в старших битах, обратный номер строки
+        (меньший id впереди) в младших.
+        """
+        position = self.positions([title_id])[0]
+        if position < 0:
+            return []
+        scores = self.similarity(position)
+        scores[position] = 0
+        keys = (scores * SCORE_SCALE).astype(np.uint64) << np.uint64(32)
+        keys |= np.arange(len(keys) - 1, -1, -1, dtype=np.uint64)
+        if len(keys) > limit:
+            candidates = np.argpartition(keys, -limit)[-limit:]
+        else:
+            candidates = np.arange(len(keys))
+        candidates = candidates[np.argsort(keys[candidates])[::-1]]
+        return [
+            (int(self.ids[row]), round(float(scores[row]), 4))
+            for row in candidates
+            if scores[row] > 0
+        ]
+
+
+class SimilarTitles:
+    """Индекс процесса, который догоняет базу при смене версий ресурсов.
+
+    Измененные после прошлой синхронизации произведения (по updated_at)
+    и их жанры перечитываются и переписываются в массивах на месте, новые
+    дописываются в конец. Удаление произведений ведет к полной
+    перестройке, как и любое изменение категорий и жанров; до нее
+    удаленные id отсеиваются при чтении произведений из базы.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.index = None
+        self.versions = None
+        self.synced_at = None
+
+    def refresh(self):
+        versions = get_versions(SIMILAR_RESOURCES + REFERENCE_RESOURCES)
+        if self.index is not None and versions == self.versions:
+            return
+        started = timezone.now()
+        references = slice(len(SIMILAR_RESOURCES), None)
+        if (
+            self.index is None
+            or versions[references] != self.versions[references]
+            or not self.update_changed()
+        ):
+            self.index = SimilarTitlesIndex.load()
+        self.versions = versions
+        self.synced_at = started - REFRESH_OVERLAP
+
+    def update_changed(self):
+        """Переносит в индекс изменения; False, если нужна перестройка.
+
+        Удаления видны по числу произведений с id не больше последнего в
+        индексе: новые произведения получают большие id и в это число не
+        входят.
+        """
+        indexed = Title.objects.all()
+        if len(self.index.ids):
+            indexed = indexed.filter(pk__lte=int(self.index.ids[-1]))
+        if indexed.count() != len(self.index.ids):
+            return False
+        rows = list(
+            Title.objects.filter(updated_at__gte=self.synced_at)
+            .order_by().values_list('pk', 'category_id', 'rating')
+        )
+        links = list(
+            GenreTitle.objects.filter(
+                title_id__in=[row[0] for row in rows], genre__isnull=False
+            ).order_by().values_list('title_id', 'genre_id')
+        )
+        if not self.index.can_update(rows, links):
+            return False
+        self.index.update(rows, links)
+        return True
+
+    def similar(self, title_id, limit):
+        with self.lock:
+            self.refresh()
+            return self.index.similar(title_id, limit)
+
+
+similar_titles = SimilarTitles()
@@ -9,7 +9,8 @@ from .views import (
     TitleViewSet,
     UsersViewSet,
     ReviewViewSet,
-    CommentViewSet
+    CommentViewSet,
+    ModerationViewSet,
 )
 
 v1_router = DefaultRouter()
@@ -17,6 +18,7 @@ v1_router.register(r"categories", CategoryViewSet, basename="categories")
 v1_router.register(r"genres", GenreViewSet, basename="genres")
 v1_router.register(r"titles", TitleViewSet, basename="titles")
 v1_router.register(r"users", UsersViewSet)
+v1_router.register(r"moderation", ModerationViewSet, basename="moderation")
 v1_router.register(
     r"titles/(?P<title_id>\d+)/reviews",
     ReviewViewSet,
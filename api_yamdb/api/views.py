@@ -1,13 +1,20 @@
+import re
+
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import IntegrityError
+from django.db.models import F
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.conf import settings
 from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.viewsets import ModelViewSet, GenericViewSet
 from rest_framework import filters
@@ -16,27 +23,72 @@ from rest_framework.mixins import (CreateModelMixin,
                                    DestroyModelMixin)
 
 from users.models import User
-from reviews.models import Category, Genre, Review, Title
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    Review,
+    Title,
+    TitleScore,
+    get_score_histograms,
+)
+from reviews.recommendations import is_stale, refresh_user
+from reviews.search import write_atomic
 from users.serializers import UserSerializer
 from .serializers import (
     CategorySerializer,
     CommentSerializer,
+    EmbeddedReviewSerializer,
     GenreSerializer,
     ReviewSerializer,
     SignupSerializer,
     TitleSerializer,
+    TitleDetailSerializer,
     GenreTitleSerializer,
+    LeaderboardTitleSerializer,
+    ModerationSerializer,
+    RecommendedTitleSerializer,
+    SimilarTitleSerializer,
     TokenSerializer,
 )
 from .permissions import (
     AdminOnly,
     AdminOrReadOnly,
     IsAuthorOrModerOrAdmin,
+    ModeratorOrAdmin,
     OnlyRegistered,
 )
-from .filters import TitleFilter
+from .bulk import bulk_write_titles
+from .cache import (
+    CachedListMixin,
+    CachedRetrieveMixin,
+    ConditionalGetMixin,
+    get_or_set_versioned,
+    get_query_signature,
+)
+from .export import export_comments, export_reviews, ndjson_response
+from .facets import get_title_facets
+from .filters import CommentFilter, ReviewFilter, TitleFilter
+from .mixins import EagerLoadingMixin, ParentObjectsMixin, eager_load
+from .moderation import (
+    moderate_comments,
+    moderate_reviews,
+    select_for_moderation,
+    stream_progress,
+)
+from .pagination import (
+    PubDatePagination, ReviewPagination, TitlePagination
+)
+from .references import ReferenceListMixin, categories, genres
+from .similar import similar_titles
+from .signals import COMMENTS_OF_REVIEW, REVIEWS_OF_TITLE, bump_on_commit
 from .utils import check_email_exist, check_username_exist
 
+EXPAND_REVIEWS_PATTERN = re.compile(r"^reviews(?:\[:(\d+)\])?$")
+# Только ASCII-цифры: int() не разбирает, например, надстрочные.
+EXPORT_AFTER_PATTERN = re.compile(r"[0-9]+")
+ONE_REVIEW_ERROR = "Возможен только один отзыв на произведение!"
+
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
@@ -80,13 +132,22 @@ def token(request):
 
 
 class CreateListDestroyViewSet(
-    CreateModelMixin, ListModelMixin, DestroyModelMixin, GenericViewSet
+    EagerLoadingMixin,
+    CreateModelMixin,
+    ListModelMixin,
+    DestroyModelMixin,
+    GenericViewSet,
 ):
     pass
 
 
-class CategoryViewSet(CreateListDestroyViewSet):
+class CategoryViewSet(
+    CachedListMixin, ReferenceListMixin, CreateListDestroyViewSet
+):
+    cache_resources = ("reviews.category",)
+    query_budgets = {"list": 2, "create": 3, "destroy": 5}
     queryset = Category.objects.all()
+    reference = categories
     serializer_class = CategorySerializer
     filter_backends = (filters.SearchFilter,)
     permission_classes = (AdminOrReadOnly,)
@@ -94,8 +155,13 @@ class CategoryViewSet(CreateListDestroyViewSet):
     lookup_field = "slug"
 
 
-class GenreViewSet(CreateListDestroyViewSet):
+class GenreViewSet(
+    CachedListMixin, ReferenceListMixin, CreateListDestroyViewSet
+):
+    cache_resources = ("reviews.genre",)
+    query_budgets = {"list": 2, "create": 3, "destroy": 5}
     queryset = Genre.objects.all()
+    reference = genres
     serializer_class = GenreSerializer
     filter_backends = (filters.SearchFilter,)
     permission_classes = (AdminOrReadOnly,)
@@ -103,20 +169,239 @@ class GenreViewSet(CreateListDestroyViewSet):
     lookup_field = "slug"
 
 
-class TitleViewSet(ModelViewSet):
-    queryset = Title.objects.annotate(rating=Avg('reviews__score')).all()
+class TitleViewSet(
+    ConditionalGetMixin,
+    CachedListMixin,
+    CachedRetrieveMixin,
+    EagerLoadingMixin,
+    ModelViewSet,
+):
+    cache_resources = conditional_resources = (
+        "reviews.title",
+        "reviews.genre",
+        "reviews.category",
+        "reviews.genretitle",
+        "reviews.review",
+        # Имена авторов в ?expand=reviews.
+        "users.user",
+    )
+    queryset = Title.objects.all()
     serializer_class = TitleSerializer
     filter_backends = (DjangoFilterBackend,)
     permission_classes = (AdminOrReadOnly,)
     filterset_class = TitleFilter
+    pagination_class = TitlePagination
+    facet_resources = (
+        "reviews.title",
+        "reviews.genre",
+        "reviews.category",
+        "reviews.genretitle",
+    )
+    score_resources = ("reviews.title", "reviews.review")
+    query_budgets = {
+        "list": 4,
+        "retrieve": 5,
+        "create": 9,
+        "update": 11,
+        "partial_update": 11,
+        "destroy": 17,
+        # У bulk бюджета нет: число запросов растет с числом пакетов
+        # по BATCH_SIZE в api.bulk.
+        "top": 3,
+        # Включая догон индекса похожих, если он устарел.
+        "similar": 9,
+        "scores": 3,
+        "facets": 4,
+        "export_reviews": 3,
+        "export_comments": 3,
+    }
 
     def get_serializer_class(self):
+        if self.action == "top":
+            return LeaderboardTitleSerializer
+        if self.action == "similar":
+            return SimilarTitleSerializer
+        if self.action == "retrieve":
+            return TitleDetailSerializer
         if self.request.method == "GET":
             return GenreTitleSerializer
         return TitleSerializer
 
+    def get_expand_reviews_limit(self):
+        """Число отзывов из ?expand=reviews[:N] или None без параметра."""
+        value = self.request.query_params.get("expand")
+        if value is None:
+            return None
+        match = EXPAND_REVIEWS_PATTERN.match(value)
+        if match is None:
+            raise ValidationError(
+                {"expand": "Ожидается reviews или reviews[:N]."}
+            )
+        if match.group(1) is None:
+            return settings.EXPAND_REVIEWS_DEFAULT
+        limit = int(match.group(1))
+        if not 0 < limit <= settings.EXPAND_REVIEWS_LIMIT:
+            raise ValidationError({
+                "expand": "Число отзывов должно быть от 1 до "
+                          f"{settings.EXPAND_REVIEWS_LIMIT}."
+            })
+        return limit
+
+    def get_object(self):
+        """Произведение; с ?expand=reviews — и его последние отзывы.
+
+        Отзывы с авторами читаются одним запросом через связанный
+        менеджер, поэтому произведение в них не загружается повторно.
+        """
+        title = super().get_object()
+        if self.action != "retrieve":
+            return title
+        limit = self.get_expand_reviews_limit()
+        if limit is not None:
+            reviews = eager_load(
+                title.reviews.filter(is_hidden=False)
+                .order_by("-pub_date", "-id"),
+                EmbeddedReviewSerializer(),
+            )
+            title.latest_reviews = list(reviews[:limit])
+        return title
+
+    def perform_destroy(self, instance):
+        """Каскад удаляет отзывы и комментарии из FTS5-индексов."""
+        with write_atomic():
+            instance.delete()
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """Пакетно создает (без id) и обновляет (с id) произведения."""
+        if not isinstance(request.data, list):
+            return Response(
+                {"detail": "Ожидается список произведений."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(request.data) > settings.BULK_TITLES_LIMIT:
+            return Response(
+                {"detail": "Слишком много произведений в одном запросе: "
+                           f"не больше {settings.BULK_TITLES_LIMIT}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        result = bulk_write_titles(request.data)
+        if not result["errors"]:
+            response_status = status.HTTP_201_CREATED
+        elif result["created"] or result["updated"]:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(result, status=response_status)
+
+    @action(detail=False, methods=["get"])
+    def top(self, request):
+        """Лучшие произведения по взвешенному рейтингу.
+
+        Фильтры списка (category, genre, ...) сужают рейтинг до категории
+        или жанра; сортировку обслуживают индексы по weighted_rating.
+        """
+        return self.get_cached_response(self.get_top, request)
+
+    def get_top(self, request):
+        queryset = self.filter_queryset(
+            self.get_queryset().filter(weighted_rating__isnull=False)
+        ).order_by("-weighted_rating", "id")
+        serializer = self.get_serializer(
+            queryset[:settings.LEADERBOARD_SIZE], many=True
+        )
+        return Response(serializer.data)
+
+    @action(detail=True, methods=["get"])
+    def similar(self, request, pk=None):
+        """Похожие произведения: жанры, категория и близость рейтинга.
+
+        Кандидаты ранжируются индексом в памяти процесса, из базы
+        читаются только найденные произведения.
+        """
+        return self.get_cached_response(self.get_similar, request, pk)
+
+    def get_similar(self, request, pk):
+        title = get_object_or_404(Title.objects.only("pk"), pk=pk)
+        ranked = dict(
+            similar_titles.similar(title.pk, settings.SIMILAR_TITLES_SIZE)
+        )
+        titles = self.filter_queryset(
+            self.get_queryset().filter(pk__in=ranked)
+        ).order_by()
+        titles = sorted(titles, key=lambda t: (-ranked[t.pk], t.pk))
+        for title in titles:
+            title.similarity = ranked[title.pk]
+        return Response(self.get_serializer(titles, many=True).data)
+
+    @action(detail=False, methods=["get"])
+    def scores(self, request):
+        """Гистограммы оценок нескольких произведений: ?ids=1,2,3."""
+        try:
+            ids = sorted({
+                int(value)
+                for value in request.query_params.get("ids", "").split(",")
+                if value.strip()
+            })
+        except ValueError:
+            raise ValidationError({"ids": "Ожидаются id через запятую."})
+        if not 0 < len(ids) <= settings.SCORES_BATCH_LIMIT:
+            raise ValidationError({
+                "ids": "Нужно от 1 до "
+                       f"{settings.SCORES_BATCH_LIMIT} произведений."
+            })
+        histograms = get_or_set_versioned(
+            "scores",
+            ",".join(map(str, ids)),
+            self.score_resources,
+            lambda: get_score_histograms(
+                Title.objects.filter(pk__in=ids).values_list("pk", flat=True)
+            ),
+        )
+        return Response(histograms)
+
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        filterset = self.filterset_class(
+            request.query_params,
+            queryset=self.get_queryset(),
+            request=request,
+        )
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        facets = get_or_set_versioned(
+            "facets",
+            get_query_signature(request),
+            self.facet_resources,
+            lambda: get_title_facets(filterset.qs),
+        )
+        return Response(facets)
+
+    def get_export_after(self):
+        """id, после которого продолжается выгрузка: ?after=<id>."""
+        value = self.request.query_params.get("after", "0")
+        if not EXPORT_AFTER_PATTERN.fullmatch(value):
+            raise ValidationError(
+                {"after": "Ожидается id последней полученной строки."}
+            )
+        return int(value)
+
+    @action(detail=True, methods=["get"], url_path="export/reviews")
+    def export_reviews(self, request, pk=None):
+        """Все видимые отзывы произведения потоком NDJSON."""
+        after = self.get_export_after()
+        title = get_object_or_404(Title.objects.only("pk"), pk=pk)
+        return ndjson_response(request, export_reviews(title.pk, after))
 
-class UsersViewSet(ModelViewSet):
+    @action(detail=True, methods=["get"], url_path="export/comments")
+    def export_comments(self, request, pk=None):
+        """Все видимые комментарии к отзывам произведения потоком NDJSON."""
+        after = self.get_export_after()
+        title = get_object_or_404(Title.objects.only("pk"), pk=pk)
+        return ndjson_response(request, export_comments(title.pk, after))
+
+
+class UsersViewSet(EagerLoadingMixin, ModelViewSet):
     queryset = User.objects.all()
     lookup_field = "username"
     serializer_class = UserSerializer
@@ -124,6 +409,34 @@ class UsersViewSet(ModelViewSet):
     search_fields = ("username",)
     permission_classes = (AdminOnly,)
     http_method_names = ["get", "post", "patch", "delete"]
+    query_budgets = {
+        "list": 3,
+        "retrieve": 2,
+        "create": 5,
+        "partial_update": 4,
+        # Каскад и пересчет счетчиков затронутых произведений и отзывов.
+        "destroy": 28,
+        "me": 4,
+        "recommendations": 14,
+    }
+
+    def perform_destroy(self, instance):
+        """Каскад удаляет отзывы и комментарии пользователя, поэтому
+        счетчики затронутых произведений и отзывов пересчитываются по
+        таблицам в той же транзакции."""
+        with write_atomic():
+            titles = set(instance.reviews.values_list("title_id", flat=True))
+            commented = dict(
+                Review.objects.filter(comments__author=instance)
+                .exclude(author=instance).values_list("pk", "title_id")
+            )
+            instance.delete()
+            Title.recalculate_ratings(titles)
+            TitleScore.rebuild(titles=titles)
+            Review.recalculate_comments(commented)
+            bump_on_commit(Title._meta.label_lower)
+            for title_id in set(commented.values()):
+                bump_on_commit(REVIEWS_OF_TITLE.format(title_id=title_id))
 
     @action(
         detail=False,
@@ -140,48 +453,164 @@ class UsersViewSet(ModelViewSet):
         serializer.save(role=user.role)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="me/recommendations",
+        permission_classes=(IsAuthenticated,),
+    )
+    def recommendations(self, request):
+        """Рекомендованные произведения по прогнозу оценки.
 
-class ReviewViewSet(ModelViewSet):
+        Рекомендации считает команда build_recommendations; если отзывы
+        пользователя изменились после расчета, его рекомендации
+        пересчитываются по сохраненным соседям произведений.
+        """
+        if is_stale(request.user):
+            refresh_user(request.user)
+        serializer = RecommendedTitleSerializer(
+            context=self.get_serializer_context()
+        )
+        titles = eager_load(
+            Title.objects.filter(recommendations__user=request.user)
+            .annotate(predicted_score=F("recommendations__score"))
+            .order_by("-predicted_score", "id"),
+            serializer,
+        )
+        serializer = RecommendedTitleSerializer(
+            titles, many=True, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+
+class ReviewViewSet(
+    ConditionalGetMixin, ParentObjectsMixin, EagerLoadingMixin, ModelViewSet
+):
+    conditional_resources = (REVIEWS_OF_TITLE, "users.user")
+    parent_lookups = {"title": (Title, {"pk": "title_id"})}
+    query_budgets = {
+        "list": 4,
+        "retrieve": 3,
+        "create": 11,
+        "update": 13,
+        "partial_update": 13,
+        "destroy": 10,
+    }
     serializer_class = ReviewSerializer
     permission_classes = (IsAuthorOrModerOrAdmin,)
-    filter_backends = (
-        DjangoFilterBackend,
-        filters.SearchFilter,
-    )
-    search_fields = ("score", "author")
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = ReviewFilter
+    pagination_class = ReviewPagination
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, pk=self.kwargs.get("title_id"))
+        """Отзыв вставляется без предварительной проверки: второй отзыв
+        автора отсекает ограничение title_one_review, в том числе при
+        одновременных запросах."""
+        title = self.get_parent("title")
+        try:
+            with write_atomic():
+                review = serializer.save(
+                    author=self.request.user, title=title
+                )
+                title.update_rating(review.score, 1)
+                title.update_scores(added=review.score)
+        except IntegrityError:
+            if Review.objects.filter(
+                author=self.request.user, title=title
+            ).exists():
+                raise ValidationError(
+                    {api_settings.NON_FIELD_ERRORS_KEY: [ONE_REVIEW_ERROR]}
+                )
+            raise
+
+    @write_atomic()
+    def perform_update(self, serializer):
+        old_score = serializer.instance.score
+        review = serializer.save()
+        review.title.update_rating(review.score - old_score)
+        review.title.update_scores(added=review.score, removed=old_score)
 
-        serializer.save(author=self.request.user, title=title)
+    @write_atomic()
+    def perform_destroy(self, instance):
+        instance.title.update_rating(-instance.score, -1)
+        instance.title.update_scores(removed=instance.score)
+        instance.delete()
 
     def get_queryset(self):
-        title_id = self.kwargs.get("title_id", None)
-        title = get_object_or_404(Title, pk=title_id)
-        return title.reviews.all()
+        return self.get_parent("title").reviews.filter(is_hidden=False)
 
 
-class CommentViewSet(ModelViewSet):
+class CommentViewSet(
+    ConditionalGetMixin, ParentObjectsMixin, EagerLoadingMixin, ModelViewSet
+):
+    conditional_resources = (COMMENTS_OF_REVIEW, "users.user")
+    parent_lookups = {
+        "review": (
+            Review.objects.filter(is_hidden=False),
+            {"pk": "review_id", "title_id": "title_id"},
+        ),
+    }
+    query_budgets = {
+        "list": 4,
+        "retrieve": 3,
+        "create": 6,
+        "update": 4,
+        "partial_update": 4,
+        "destroy": 7,
+    }
     serializer_class = CommentSerializer
     permission_classes = [IsAuthorOrModerOrAdmin]
-    filter_backends = (
-        DjangoFilterBackend,
-        filters.SearchFilter,
-    )
-    search_fields = ("review", "author")
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = CommentFilter
+    pagination_class = PubDatePagination
 
     def get_queryset(self):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get("review_id"),
-            title__id=self.kwargs.get("title_id")
-        )
-        return review.comments.all()
+        return self.get_parent("review").comments.filter(is_hidden=False)
 
+    @write_atomic()
     def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get("review_id"),
-            title__id=self.kwargs.get("title_id")
+        review = self.get_parent("review")
+        serializer.save(author=self.request.user, review=review)
+        self.update_review_comments(review, 1)
+
+    @write_atomic()
+    def perform_destroy(self, instance):
+        instance.delete()
+        self.update_review_comments(instance.review, -1)
+
+    def update_review_comments(self, review, count_delta):
+        """Счетчики отзыва видны в списке отзывов произведения."""
+        review.update_comments(count_delta)
+        bump_on_commit(REVIEWS_OF_TITLE.format(title_id=review.title_id))
+
+
+class ModerationViewSet(GenericViewSet):
+    """Массовое удаление и скрытие отзывов и комментариев.
+
+    Строки обрабатываются порциями по MODERATION_BATCH_SIZE, каждая в
+    своей транзакции; ответ — NDJSON с прогрессом после каждой порции.
+    """
+
+    serializer_class = ModerationSerializer
+    permission_classes = (ModeratorOrAdmin,)
+
+    @action(detail=False, methods=["post"])
+    def reviews(self, request):
+        return self.moderate(request, Review, moderate_reviews)
+
+    @action(detail=False, methods=["post"])
+    def comments(self, request):
+        return self.moderate(request, Comment, moderate_comments)
+
+    def moderate(self, request, model, process):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        progress = process(
+            select_for_moderation(model, data),
+            data["action"],
+            settings.MODERATION_BATCH_SIZE,
+        )
+        return StreamingHttpResponse(
+            stream_progress(progress), content_type="application/x-ndjson"
         )
-        serializer.save(author=self.request.user, review_id=review.id)
@@ -29,6 +29,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.budget.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -66,10 +67,30 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Файловая тестовая база: общая база в памяти блокирует таблицы
+        # без ожидания, и параллельные запросы к live_server падают.
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
 
+# Cache
+# Версии ресурсов в кэше сбрасывают справочники и ответы во всех
+# процессах, поэтому кэш должен быть общим для воркеров: файловый кэш
+# подходит для одного узла, для нескольких нужен Redis или Memcached.
+# Кэш в памяти процесса (LocMemCache) допустим только с одним воркером.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+}
+
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -123,6 +144,33 @@ LEN_BIO = 200
 LEN_EMAIL = 254
 LEN_NAME = 256
 
+BULK_TITLES_LIMIT = 5000
+
+EXPAND_REVIEWS_DEFAULT = 10
+EXPAND_REVIEWS_LIMIT = 100
+
+SCORES_BATCH_LIMIT = 100
+
+SIMILAR_TITLES_SIZE = 10
+SIMILAR_GENRE_WEIGHT = 0.6
+SIMILAR_CATEGORY_WEIGHT = 0.25
+SIMILAR_RATING_WEIGHT = 0.15
+
+RECOMMENDATIONS_SIZE = 20
+RECOMMENDATION_NEIGHBOURS = 20
+RECOMMENDATION_SHRINKAGE = 10
+
+LEADERBOARD_SIZE = 100
+LEADERBOARD_PRIOR_MEAN = 6
+LEADERBOARD_PRIOR_WEIGHT = 10
+
+QUERY_BUDGET_FINGERPRINTS = 5
+
+MODERATION_BATCH_SIZE = 500
+MODERATION_IDS_LIMIT = 10000
+
+EXPORT_CHUNK_SIZE = 2000
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -0,0 +1,56 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from reviews.recommendations import (
+    RatingMatrix, find_neighbours, recommend_all
+)
+
+
+class Command(BaseCommand):
+    """Замеряет расчет рекомендаций на синтетических отзывах.
+
+    Популярность произведений убывает по степенному закону, как в
+    реальном каталоге; база не используется.
+    """
+
+    help = 'Бенчмарк item-item рекомендаций: соседи и прогнозы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reviews', type=int, default=10_000_000)
+        parser.add_argument('--users', type=int, default=200_000)
+        parser.add_argument('--titles', type=int, default=50_000)
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        count = options['reviews']
+        popularity = 1 / np.arange(1, options['titles'] + 1) ** 0.8
+        titles = rng.choice(
+            options['titles'], count, p=popularity / popularity.sum()
+        )
+        authors = rng.integers(0, options['users'], count)
+        scores = rng.integers(1, 11, count)
+
+        started = time.perf_counter()
+        matrix = RatingMatrix(authors, titles, scores)
+        built = time.perf_counter() - started
+        started = time.perf_counter()
+        neighbours = find_neighbours(matrix, options['workers'])
+        found = time.perf_counter() - started
+        started = time.perf_counter()
+        recommendations = recommend_all(
+            matrix, neighbours, options['workers']
+        )
+        recommended = time.perf_counter() - started
+
+        self.stdout.write(
+            f'Отзывов: {count}, пользователей: {len(matrix.user_ids)}, '
+            f'произведений: {len(matrix.title_ids)}\n'
+            f'Матрица CSR: {built:.1f} с\n'
+            f'Соседи: {found:.1f} с ({len(neighbours[0])} пар)\n'
+            f'Рекомендации: {recommended:.1f} с '
+            f'({len(recommendations[0])} строк)'
+        )
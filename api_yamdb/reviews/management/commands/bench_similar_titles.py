@@ -0,0 +1,62 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.similar import SimilarTitlesIndex
+
+
+class Command(BaseCommand):
+    """Замеряет поиск похожих произведений по индексу в памяти.
+
+    Индекс строится из синтетических строк, база не используется.
+    """
+
+    help = 'Бенчмарк похожих произведений: построение индекса и запросы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1_000_000)
+        parser.add_argument('--genres', type=int, default=40)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        count = options['titles']
+        rows = [
+            (
+                pk,
+                rng.randrange(options['categories']),
+                rng.choice((None, rng.uniform(1, 10))),
+            )
+            for pk in range(1, count + 1)
+        ]
+        links = [
+            (pk, genre_id)
+            for pk in range(1, count + 1)
+            for genre_id in rng.sample(
+                range(1, options['genres'] + 1), rng.randint(1, 4)
+            )
+        ]
+
+        started = time.perf_counter()
+        index = SimilarTitlesIndex.from_rows(
+            rows, links, range(1, options['genres'] + 1)
+        )
+        built = time.perf_counter() - started
+
+        title_ids = [
+            rng.randint(1, count) for _ in range(options['queries'])
+        ]
+        started = time.perf_counter()
+        for title_id in title_ids:
+            index.similar(title_id, options['limit'])
+        query = (time.perf_counter() - started) * 1000 / len(title_ids)
+
+        self.stdout.write(
+            f'Произведений: {count}, жанров: {options["genres"]}\n'
+            f'Построение индекса: {built:.2f} с\n'
+            f'Запрос похожих: {query:.2f} мс'
+        )
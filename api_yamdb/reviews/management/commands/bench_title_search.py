@@ -0,0 +1,89 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.models import Title
+from reviews.search import build_match_query, normalize_search_text
+
+SYLLABLES = (
+    'ё', 'жи', 'ту', 'ман', 'со', 'ля', 'рис', 'ста', 'лкер', 'зер',
+    'ка', 'ло', 'ан', 'дро', 'ме', 'да', 'вой', 'на', 'мир', 'шэ',
+    'sha', 'dow', 'ri', 'ver', 'night', 'em', 'pire', 'gar', 'den',
+)
+
+
+class Command(BaseCommand):
+    """Сравнивает поиск по названию через LIKE и через FTS5-индекс.
+
+    Произведения создаются во временной транзакции, которая в конце
+    откатывается, поэтому данные базы не меняются.
+    """
+
+    help = 'Бенчмарк поиска произведений: LIKE против FTS5.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--vocabulary', type=int, default=20_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = [
+            ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+            for _ in range(options['vocabulary'])
+        ]
+        with transaction.atomic():
+            self.fill(
+                rng, vocabulary, options['titles'], options['batch_size']
+            )
+            words = [
+                rng.choice(vocabulary) for _ in range(options['queries'])
+            ]
+            like = self.measure(words, self.like_page)
+            fts = self.measure(words, self.fts_page)
+            transaction.set_rollback(True)
+        self.stdout.write(
+            f'Произведений: {options["titles"]}, '
+            f'запросов: {options["queries"]}\n'
+            f'LIKE: {like:.2f} мс на запрос\n'
+            f'FTS5: {fts:.2f} мс на запрос\n'
+            f'Ускорение: {like / fts:.1f}x'
+        )
+
+    def fill(self, rng, vocabulary, count, batch_size):
+        for start in range(0, count, batch_size):
+            titles = []
+            for _ in range(min(batch_size, count - start)):
+                name = ' '.join(
+                    rng.choice(vocabulary).capitalize()
+                    for _ in range(rng.randint(1, 4))
+                )
+                titles.append(Title(
+                    name=name,
+                    search_name=normalize_search_text(name),
+                    year=rng.randint(1900, 2020),
+                ))
+            Title.objects.bulk_create(titles, batch_size=batch_size)
+
+    @staticmethod
+    def like_page(word):
+        queryset = Title.objects.filter(name__contains=word)
+        return queryset.count(), list(queryset[:10])
+
+    @staticmethod
+    def fts_page(word):
+        queryset = Title.objects.filter(
+            search__search_name__match=build_match_query(word)
+        ).order_by('search__rank')
+        return queryset.count(), list(queryset[:10])
+
+    @staticmethod
+    def measure(words, page):
+        started = time.perf_counter()
+        for word in words:
+            page(word)
+        return (time.perf_counter() - started) * 1000 / len(words)
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.recommendations import build_recommendations
+
+
+class Command(BaseCommand):
+    """Пересчитывает соседей произведений и рекомендации пользователей."""
+
+    help = 'Строит рекомендации произведений по оценкам пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Процессов для расчета соседей (по умолчанию — по ядрам).'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        titles, neighbours, users = build_recommendations(options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Произведений: {titles}, пар соседей: {neighbours}, '
+            f'пользователей: {users}, '
+            f'время: {time.perf_counter() - started:.1f} с.'
+        ))
@@ -171,3 +171,6 @@ class Command(BaseCommand):
             ) as csv_file:
                 reader = csv.reader(csv_file, delimiter=",")
                 load_data_from_csv_to_model(im_inf, reader)
+        apps.get_model("reviews.Title").recalculate_ratings()
+        apps.get_model("reviews.TitleScore").rebuild()
+        apps.get_model("reviews.Review").recalculate_comments()
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    """Пересчитывает рейтинги и взвешенные рейтинги всех произведений."""
+
+    help = 'Перестраивает рейтинг лучших произведений по таблице отзывов.'
+
+    def handle(self, *args, **options):
+        Title.recalculate_ratings()
+        self.stdout.write(self.style.SUCCESS(
+            'Рейтинги произведений пересчитаны.'
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import TitleScore
+
+
+class Command(BaseCommand):
+    """Пересчитывает гистограммы оценок всех произведений."""
+
+    help = 'Перестраивает гистограммы оценок по таблице отзывов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        TitleScore.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            'Гистограммы оценок пересчитаны.'
+        ))
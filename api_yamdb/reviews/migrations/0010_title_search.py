@@ -0,0 +1,42 @@
+# Generated by Django 3.2 on 2026-10-18 16:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+import reviews.search
+
+
+def fill_search_name(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    titles = []
+    for title in Title.objects.only('name').iterator():
+        title.search_name = reviews.search.normalize_search_text(title.name)
+        titles.append(title)
+    Title.objects.bulk_update(titles, ('search_name',), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_year_name_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleSearch',
+            fields=[
+                ('title', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search', serialize=False, to='reviews.title')),
+                ('search_name', reviews.search.SearchField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'reviews_title_fts',
+                'managed': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='search_name',
+            field=models.CharField(default='', editable=False, max_length=256, verbose_name='Название для поиска'),
+        ),
+        migrations.RunPython(fill_search_name, migrations.RunPython.noop),
+    ]
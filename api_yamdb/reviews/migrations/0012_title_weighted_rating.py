@@ -0,0 +1,42 @@
+# Generated by Django 3.2 on 2026-10-18 16:55
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast
+
+
+def fill_weighted_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    weight = settings.LEADERBOARD_PRIOR_WEIGHT
+    Title.objects.filter(review_count__gt=0).update(
+        weighted_rating=Cast(
+            Value(float(weight * settings.LEADERBOARD_PRIOR_MEAN))
+            + F('rating_sum'),
+            FloatField()
+        ) / (Value(weight) + F('review_count'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='weighted_rating',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Взвешенный рейтинг'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-weighted_rating', 'id'], name='title_weighted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', '-weighted_rating', 'id'], name='title_category_weighted_idx'),
+        ),
+        migrations.RunPython(fill_weighted_rating, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2 on 2026-10-18 17:07
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def delete_duplicate_links(apps, schema_editor):
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    links = GenreTitle.objects.filter(
+        title__isnull=False, genre__isnull=False
+    )
+    first_ids = (
+        links.order_by().values('title', 'genre')
+        .annotate(first_id=Min('pk')).values('first_id')
+    )
+    links.exclude(pk__in=first_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0014_title_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_duplicate_links, migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name='genretitle',
+            index=models.Index(fields=['genre', 'title'], name='genre_title_genre_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='genretitle',
+            constraint=models.UniqueConstraint(fields=('title', 'genre'), name='genre_title_unique'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 3.2 on 2026-10-18 17:37
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_counts(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Comment = apps.get_model('reviews', 'Comment')
+    comments = (
+        Comment.objects.filter(review=OuterRef('pk')).order_by()
+    )
+    Review.objects.update(
+        comment_count=Coalesce(Subquery(
+            comments.values('review').annotate(c=Count('pk')).values('c')
+        ), 0),
+        last_comment_at=Subquery(
+            comments.order_by('-pub_date').values('pub_date')[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0018_pub_date_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество комментариев'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата последнего комментария'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['title', 'comment_count', 'id'], name='review_title_comments_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['title', 'last_comment_at', 'id'], name='review_title_last_comment_idx'),
+        ),
+        migrations.RunPython(fill_comment_counts, migrations.RunPython.noop),
+    ]
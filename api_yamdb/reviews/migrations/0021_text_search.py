@@ -0,0 +1,39 @@
+# Generated by Django 3.2 on 2026-10-18 17:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+import reviews.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0020_moderation_hidden'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentSearch',
+            fields=[
+                ('comment', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search', serialize=False, to='reviews.comment')),
+                ('text', reviews.search.SearchField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'reviews_comment_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ReviewSearch',
+            fields=[
+                ('review', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search', serialize=False, to='reviews.review')),
+                ('text', reviews.search.SearchField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'reviews_review_fts',
+                'managed': False,
+            },
+        ),
+    ]
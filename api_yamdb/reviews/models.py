@@ -1,10 +1,59 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (
+    Avg, Case, Count, F, FloatField, OuterRef, Subquery, Sum, Value, When
+)
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
 from django.conf import settings
 
 from api_yamdb.validators import validate_year, validate_slug
+from .search import (
+    COMMENT_SEARCH_TABLE,
+    REVIEW_SEARCH_TABLE,
+    TITLE_SEARCH_TABLE,
+    SearchField,
+    normalize_search_text,
+)
 from users.models import User
 
 
+def bayesian_rating(rating_sum, review_count):
+    """Байесовская оценка: среднее, сглаженное априорными отзывами.
+
+    К отзывам добавляется LEADERBOARD_PRIOR_WEIGHT воображаемых оценок
+    LEADERBOARD_PRIOR_MEAN, поэтому пара десяток не выводит произведение
+    на первое место.
+    """
+    weight = settings.LEADERBOARD_PRIOR_WEIGHT
+    return Cast(
+        Value(float(weight * settings.LEADERBOARD_PRIOR_MEAN)) + rating_sum,
+        FloatField()
+    ) / (Value(weight) + review_count)
+
+
+class CountersMixin:
+    """Полное сохранение существующей строки не пишет счетчики.
+
+    Счетчики из counter_fields меняются атомарными UPDATE с F(), а
+    объект, загруженный до такого UPDATE, вернул бы их старые значения.
+    Явный update_fields сохраняет то, что в нем перечислено.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not (
+            self._state.adding or args or kwargs.get('force_insert')
+            or kwargs.get('update_fields') is not None
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
 class Category(models.Model):
     name = models.CharField(
         'Название',
@@ -47,7 +96,7 @@ class Genre(models.Model):
         return self.name[:settings.LEN_TEXT]
 
 
-class Title(models.Model):
+class Title(CountersMixin, models.Model):
     name = models.CharField(
         'Название',
         max_length=settings.LEN_NAME
@@ -75,15 +124,154 @@ class Title(models.Model):
         related_name='titles',
         null=True
     )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False
+    )
+    review_count = models.PositiveIntegerField(
+        'Количество отзывов',
+        default=0,
+        editable=False
+    )
+    rating = models.FloatField(
+        'Рейтинг',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    weighted_rating = models.FloatField(
+        'Взвешенный рейтинг',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    search_name = models.CharField(
+        'Название для поиска',
+        max_length=settings.LEN_NAME,
+        editable=False,
+        default=''
+    )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('-year', 'name')
+        indexes = (
+            models.Index(
+                fields=('-year', 'name', 'id'), name='title_year_name_id_idx'
+            ),
+            models.Index(
+                fields=('-weighted_rating', 'id'), name='title_weighted_idx'
+            ),
+            models.Index(
+                fields=('rating', 'id'), name='title_rating_id_idx'
+            ),
+            models.Index(
+                fields=('review_count', 'id'),
+                name='title_review_count_id_idx'
+            ),
+            models.Index(fields=('year', 'id'), name='title_year_id_idx'),
+            models.Index(fields=('name', 'id'), name='title_name_id_idx'),
+            models.Index(fields=('updated_at',), name='title_updated_at_idx'),
+            models.Index(
+                fields=('category', '-weighted_rating', 'id'),
+                name='title_category_weighted_idx'
+            ),
+        )
+
+    counter_fields = (
+        'rating_sum', 'review_count', 'rating', 'weighted_rating'
+    )
 
     def __str__(self):
         return self.name[:settings.LEN_TEXT]
 
+    def save(self, *args, **kwargs):
+        self.search_name = normalize_search_text(self.name)
+        super().save(*args, **kwargs)
+
+    def update_rating(self, score_delta, count_delta=0):
+        """Атомарно сдвигает сумму оценок и число отзывов.
+
+        Рейтинг и взвешенный рейтинг пересчитываются в том же UPDATE,
+        поэтому чтение произведения не требует агрегации по отзывам.
+        """
+        rating_sum = F('rating_sum') + score_delta
+        review_count = F('review_count') + count_delta
+        Title.objects.filter(pk=self.pk).update(
+            rating_sum=rating_sum,
+            review_count=review_count,
+            rating=Cast(rating_sum, FloatField()) / NullIf(review_count, 0),
+            weighted_rating=Case(
+                When(
+                    review_count__gt=-count_delta,
+                    then=bayesian_rating(rating_sum, review_count),
+                ),
+                default=None,
+                output_field=FloatField(),
+            ),
+            updated_at=timezone.now(),
+        )
+
+    def update_scores(self, added=None, removed=None):
+        """Сдвигает счетчики гистограммы оценок на одну оценку."""
+        if added == removed:
+            return
+        if removed is not None:
+            TitleScore.objects.filter(title=self, score=removed).update(
+                count=F('count') - 1
+            )
+        if added is not None:
+            TitleScore.add(self, added)
+
+    @classmethod
+    def recalculate_ratings(cls, titles=None):
+        """Пересчитывает рейтинги произведений (по умолчанию всех) одним
+        UPDATE. Скрытые модератором отзывы не учитываются."""
+        reviews = (
+            Review.objects.filter(title=OuterRef('pk'), is_hidden=False)
+            .order_by().values('title')
+        )
+        queryset = cls.objects.all()
+        if titles is not None:
+            queryset = queryset.filter(pk__in=titles)
+        queryset.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(s=Sum('score')).values('s')), 0
+            ),
+            review_count=Coalesce(
+                Subquery(reviews.annotate(c=Count('pk')).values('c')), 0
+            ),
+            rating=Subquery(reviews.annotate(a=Avg('score')).values('a')),
+            weighted_rating=Subquery(reviews.annotate(
+                w=bayesian_rating(Sum('score'), Count('pk'))
+            ).values('w')),
+            updated_at=timezone.now(),
+        )
+
+
+class TitleSearch(models.Model):
+    """Строка FTS5-индекса названий, см. reviews.search."""
+
+    title = models.OneToOneField(
+        Title,
+        primary_key=True,
+        db_column='rowid',
+        on_delete=models.DO_NOTHING,
+        related_name='search'
+    )
+    search_name = SearchField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = TITLE_SEARCH_TABLE
+
 
 class GenreTitle(models.Model):
     title = models.ForeignKey(
@@ -105,6 +293,16 @@ class GenreTitle(models.Model):
         verbose_name = 'Произведение и жанр'
         verbose_name_plural = 'Произведения и жанры'
         ordering = ('id',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('title', 'genre'), name='genre_title_unique'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('genre', 'title'), name='genre_title_genre_idx'
+            ),
+        )
 
     def __str__(self):
         return f'{self.title}, жанр - {self.genre}'
@@ -123,6 +321,10 @@ class Review(models.Model):
         db_index=True,
         verbose_name='Дата публикации',
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE, null=True,
@@ -134,7 +336,16 @@ class Review(models.Model):
         on_delete=models.CASCADE,
         related_name='reviews',
         verbose_name='Произведение',
+        # Выборки по произведению обслуживает review_title_pub_date_idx.
+        db_index=False,
+    )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев', default=0
+    )
+    last_comment_at = models.DateTimeField(
+        'Дата последнего комментария', null=True, blank=True
     )
+    is_hidden = models.BooleanField('Скрыт модератором', default=False)
 
     class Meta:
         verbose_name = 'Отзыв'
@@ -144,11 +355,157 @@ class Review(models.Model):
                 fields=['title', 'author'], name='title_one_review'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx',
+            ),
+            models.Index(
+                fields=('title', 'comment_count', 'id'),
+                name='review_title_comments_idx',
+            ),
+            models.Index(
+                fields=('title', 'last_comment_at', 'id'),
+                name='review_title_last_comment_idx',
+            ),
+        )
         ordering = ('pub_date',)
 
     def __str__(self):
         return self.title.name[:settings.LEN_TEXT]
 
+    def update_comments(self, count_delta):
+        """Атомарно сдвигает число комментариев и обновляет дату
+        последнего из них.
+
+        Дата берется подзапросом по comment_review_pub_date_idx, поэтому
+        после удаления последнего комментария она откатывается к
+        предыдущему.
+        """
+        Review.objects.filter(pk=self.pk).update(
+            comment_count=F('comment_count') + count_delta,
+            last_comment_at=latest_comment_date(OuterRef('pk')),
+        )
+
+    @classmethod
+    def recalculate_comments(cls, reviews=None):
+        """Пересчитывает счетчики комментариев отзывов (по умолчанию
+        всех) одним UPDATE."""
+        comments = (
+            Comment.objects.filter(review=OuterRef('pk'), is_hidden=False)
+            .order_by().values('review')
+        )
+        queryset = cls.objects.all()
+        if reviews is not None:
+            queryset = queryset.filter(pk__in=reviews)
+        queryset.update(
+            comment_count=Coalesce(
+                Subquery(comments.annotate(c=Count('pk')).values('c')), 0
+            ),
+            last_comment_at=latest_comment_date(OuterRef('pk')),
+        )
+
+
+class ReviewSearch(models.Model):
+    """Строка FTS5-индекса текстов отзывов, см. reviews.search."""
+
+    review = models.OneToOneField(
+        Review,
+        primary_key=True,
+        db_column='rowid',
+        on_delete=models.DO_NOTHING,
+        related_name='search'
+    )
+    text = SearchField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = REVIEW_SEARCH_TABLE
+
+
+class TitleScore(models.Model):
+    """Счетчик оценки score в гистограмме оценок произведения."""
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='scores',
+        verbose_name='Произведение',
+    )
+    score = models.PositiveSmallIntegerField('Оценка')
+    count = models.PositiveIntegerField('Количество отзывов', default=0)
+
+    class Meta:
+        verbose_name = 'Оценки произведения'
+        verbose_name_plural = 'Оценки произведений'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('title', 'score'), name='title_score_unique'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.title_id}: {self.score} x {self.count}'
+
+    @classmethod
+    def add(cls, title, score):
+        """Увеличивает счетчик, создавая его при первой такой оценке."""
+        counters = cls.objects.filter(title=title, score=score)
+        if counters.update(count=F('count') + 1):
+            return
+        _, created = cls.objects.get_or_create(
+            title=title, score=score, defaults={'count': 1}
+        )
+        if not created:
+            counters.update(count=F('count') + 1)
+
+    @classmethod
+    def rebuild(cls, batch_size=1000, titles=None):
+        """Пересчитывает гистограммы произведений (по умолчанию всех)
+        одним GROUP BY по видимым отзывам."""
+        reviews = Review.objects.filter(is_hidden=False)
+        counters = cls.objects.all()
+        if titles is not None:
+            reviews = reviews.filter(title__in=titles)
+            counters = counters.filter(title__in=titles)
+        groups = (
+            reviews.order_by().values_list('title', 'score')
+            .annotate(count=Count('pk'))
+        )
+        with transaction.atomic():
+            counters.delete()
+            batch = []
+            for title_id, score, count in groups.iterator():
+                batch.append(
+                    cls(title_id=title_id, score=score, count=count)
+                )
+                if len(batch) == batch_size:
+                    cls.objects.bulk_create(batch)
+                    batch = []
+            cls.objects.bulk_create(batch)
+
+
+def latest_comment_date(review):
+    """Подзапрос: дата последнего комментария к отзыву review."""
+    return Subquery(
+        Comment.objects.filter(review=review, is_hidden=False)
+        .order_by('-pub_date').values('pub_date')[:1]
+    )
+
+
+def get_score_histograms(title_ids):
+    """Гистограммы оценок по id произведений: списки из LEN_RATING чисел."""
+    histograms = {
+        title_id: [0] * settings.LEN_RATING for title_id in title_ids
+    }
+    counters = TitleScore.objects.filter(
+        title_id__in=title_ids, count__gt=0
+    ).values_list('title_id', 'score', 'count')
+    for title_id, score, count in counters:
+        histograms[title_id][score - 1] = count
+    return histograms
+
 
 class Comment(models.Model):
     text = models.TextField(
@@ -159,6 +516,10 @@ class Comment(models.Model):
         db_index=True,
         verbose_name='Дата публикации',
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE, null=True,
@@ -170,9 +531,118 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         related_name='comments',
         verbose_name='Отзыв',
+        # Выборки по отзыву обслуживает comment_review_pub_date_idx.
+        db_index=False,
     )
+    is_hidden = models.BooleanField('Скрыт модератором', default=False)
 
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx',
+            ),
+        )
         ordering = ('pub_date',)
+
+
+class CommentSearch(models.Model):
+    """Строка FTS5-индекса текстов комментариев, см. reviews.search."""
+
+    comment = models.OneToOneField(
+        Comment,
+        primary_key=True,
+        db_column='rowid',
+        on_delete=models.DO_NOTHING,
+        related_name='search'
+    )
+    text = SearchField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = COMMENT_SEARCH_TABLE
+
+
+class TitleNeighbor(models.Model):
+    """Похожее по оценкам пользователей произведение (item-item).
+
+    Заполняется командой build_recommendations, см.
+    reviews.recommendations.
+    """
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='neighbors',
+        verbose_name='Произведение',
+    )
+    neighbor = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Соседнее произведение',
+    )
+    similarity = models.FloatField('Сходство')
+
+    class Meta:
+        verbose_name = 'Соседнее произведение'
+        verbose_name_plural = 'Соседние произведения'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('title', 'neighbor'), name='title_neighbor_unique'
+            ),
+        )
+
+
+class Recommendation(models.Model):
+    """Рекомендованное пользователю произведение с прогнозом оценки."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь',
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Произведение',
+    )
+    score = models.FloatField('Прогноз оценки')
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'title'), name='recommendation_unique'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-score', 'title'),
+                name='recommendation_user_score_idx'
+            ),
+        )
+
+
+class RecommendationState(models.Model):
+    """По каким отзывам пользователя посчитаны его рекомендации."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='recommendation_state',
+        verbose_name='Пользователь',
+    )
+    computed_at = models.DateTimeField('Дата расчета')
+    review_count = models.PositiveIntegerField('Количество отзывов')
+
+    class Meta:
+        verbose_name = 'Состояние рекомендаций'
+        verbose_name_plural = 'Состояния рекомендаций'
@@ -0,0 +1,390 @@
+"""Рекомендации произведений по схожести оценок (item-item).
+
+Отзывы — разреженная матрица пользователи × произведения, хранимая
+CSR-массивами в двух ориентациях. Для каждого произведения считаются
+top-K соседей по скорректированному косинусу (оценки центрированы по
+среднему пользователя, сходство сжимается к нулю при малом числе общих
+оценивших). Прогноз оценки пользователя для произведения — его средняя
+оценка плюс взвешенное сходством отклонение по соседям из его отзывов.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import (
+    Recommendation, RecommendationState, Review, TitleNeighbor
+)
+
+CHUNK_SIZE = 100_000
+BATCH_SIZE = 5000
+# Ячеек в плотном блоке сходств одного задания пула.
+BLOCK_CELLS = 4_000_000
+USERS_PER_BLOCK = 1024
+JITTER = 1e-12
+
+# Данные процесса-родителя для заданий пула: дочерние процессы получают
+# их через fork без копирования и сериализации.
+_shared = {}
+
+
+def to_csr(rows, columns, values, row_count):
+    """CSR: указатели начала строк, столбцы и значения по строкам."""
+    order = np.argsort(rows, kind='stable')
+    pointers = np.zeros(row_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=row_count), out=pointers[1:])
+    return pointers, columns[order], values[order]
+
+
+def expand(pointers, rows):
+    """Позиции элементов строк rows в CSR и номер строки в rows для каждой."""
+    starts = pointers[rows]
+    counts = pointers[rows + 1] - starts
+    owners = np.repeat(np.arange(len(rows)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(
+        np.cumsum(counts) - counts, counts
+    )
+    return owners, np.repeat(starts, counts) + offsets
+
+
+def top_per_owner(owners, columns, values, limit):
+    """Не более limit пар с наибольшими values на каждого owner.
+
+    Пары должны быть упорядочены по (owner, column): устойчивая
+    сортировка по одному составному ключу оставляет равные значения в
+    порядке столбцов.
+    """
+    if not len(owners):
+        return owners, columns, values
+    span = values.max() - values.min() + 1
+    order = np.argsort(
+        owners * span + (values.max() - values), kind='stable'
+    )
+    owners = owners[order]
+    starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+    counts = np.diff(np.r_[starts, len(owners)])
+    ranks = np.arange(len(owners)) - np.repeat(starts, counts)
+    keep = order[ranks < limit]
+    return owners[ranks < limit], columns[keep], values[keep]
+
+
+class RatingMatrix:
+    """Отзывы в компактных индексах: user_ids и title_ids — их id."""
+
+    def __init__(self, authors, titles, scores):
+        self.user_ids, users = np.unique(authors, return_inverse=True)
+        self.title_ids, items = np.unique(titles, return_inverse=True)
+        users = users.astype(np.int32)
+        items = items.astype(np.int32)
+        scores = scores.astype(np.float32)
+        counts = np.bincount(users, minlength=len(self.user_ids))
+        self.review_counts = counts
+        self.means = (
+            np.bincount(users, weights=scores, minlength=len(counts))
+            / np.maximum(counts, 1)
+        ).astype(np.float32)
+        centered = scores - self.means[users]
+        self.by_user = to_csr(users, items, centered, len(self.user_ids))
+        self.by_item = to_csr(items, users, centered, len(self.title_ids))
+        self.norms = np.sqrt(np.bincount(
+            items, weights=centered * centered, minlength=len(self.title_ids)
+        )).astype(np.float32)
+
+    @classmethod
+    def load(cls):
+        """Читает отзывы из базы порциями в массивы."""
+        reviews = Review.objects.filter(
+            author__isnull=False, is_hidden=False
+        ).order_by().values_list('author_id', 'title_id', 'score')
+        chunks = []
+        chunk = []
+        for row in reviews.iterator(chunk_size=CHUNK_SIZE):
+            chunk.append(row)
+            if len(chunk) == CHUNK_SIZE:
+                chunks.append(np.array(chunk, dtype=np.int64))
+                chunk = []
+        chunks.append(np.array(chunk, dtype=np.int64).reshape(-1, 3))
+        authors, titles, scores = np.concatenate(chunks).T
+        return cls(authors, titles, scores)
+
+
+def neighbour_block(items):
+    """Top-K соседей для блока произведений (задание пула процессов).
+
+    Общие оценившие перебираются через обе ориентации CSR, скалярные
+    произведения копятся bincount в плотный блок len(items) × все
+    произведения.
+    """
+    matrix = _shared['matrix']
+    item_count = len(matrix.title_ids)
+    item_pointers, item_users, item_values = matrix.by_item
+    user_pointers, user_items, user_values = matrix.by_user
+
+    owners, positions = expand(item_pointers, items)
+    raters = item_users[positions]
+    rater_values = item_values[positions]
+    rater_rows, positions = expand(user_pointers, raters)
+    cells = (
+        owners[rater_rows].astype(np.int64) * item_count
+        + user_items[positions]
+    )
+    shape = (len(items), item_count)
+    dots = np.bincount(
+        cells,
+        weights=rater_values[rater_rows] * user_values[positions],
+        minlength=shape[0] * shape[1],
+    ).reshape(shape)
+    common = np.bincount(cells, minlength=dots.size).reshape(shape)
+    norms = matrix.norms[items, None] * matrix.norms[None, :]
+    similarity = np.divide(dots, norms, out=dots, where=norms > 0)
+    similarity[norms == 0] = 0
+    similarity *= common / (common + settings.RECOMMENDATION_SHRINKAGE)
+    similarity[np.arange(len(items)), items] = 0
+    # Сдвиг на доли JITTER по номеру столбца делает значения различными:
+    # на массовых повторах (нулях) argpartition вырождается.
+    jitter = JITTER * np.arange(item_count)
+    similarity -= jitter
+    limit = min(settings.RECOMMENDATION_NEIGHBOURS, item_count)
+    top = np.argpartition(similarity, item_count - limit, axis=1)[
+        :, item_count - limit:
+    ]
+    values = np.take_along_axis(similarity, top, axis=1)
+    order = np.argsort(-values, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    values = np.take_along_axis(values, order, axis=1) + jitter[top]
+    keep = values > 0
+    owners = np.repeat(items[:, None], limit, axis=1)
+    return owners[keep], top[keep], values[keep].astype(np.float32)
+
+
+def run_blocks(function, blocks, workers=None, **shared):
+    """Выполняет function для каждого блока, при workers > 1 — в пуле."""
+    workers = workers or os.cpu_count() or 1
+    _shared.update(shared)
+    try:
+        if workers == 1 or len(blocks) <= 1:
+            results = [function(block) for block in blocks]
+        else:
+            with ProcessPoolExecutor(
+                workers, mp_context=get_context('fork')
+            ) as pool:
+                results = list(pool.map(function, blocks))
+    finally:
+        _shared.clear()
+    return [np.concatenate(parts) for parts in zip(*results)]
+
+
+def split(count, size):
+    return [
+        np.arange(start, min(start + size, count))
+        for start in range(0, count, size)
+    ]
+
+
+def find_neighbours(matrix, workers=None):
+    """Соседи всех произведений: массивы (item, neighbour, similarity)."""
+    item_count = len(matrix.title_ids)
+    block = max(1, BLOCK_CELLS // max(item_count, 1))
+    result = run_blocks(
+        neighbour_block, split(item_count, block), workers, matrix=matrix
+    )
+    if not result:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+    return tuple(result)
+
+
+def predict(owners, neighbours, similarity, deviations, means, seen,
+            width):
+    """Прогнозы оценок по соседям оцененных произведений.
+
+    Для i-го соседства: owners[i] — пользователь (номер в means),
+    neighbours[i] и similarity[i] — сосед оцененного им произведения,
+    deviations[i] — отклонение его оценки от средней. seen — коды
+    owner * width + произведение уже оцененных, они не прогнозируются.
+    Возвращает массивы (owner, произведение, прогноз).
+    """
+    cells = owners.astype(np.int64) * width + neighbours
+    # Оцененные ячейки проходят через тот же unique, что и прогнозы:
+    # одна сортировка вместо отдельного isin.
+    cells, inverse = np.unique(
+        np.concatenate((cells, seen)), return_inverse=True
+    )
+    links = inverse[:len(owners)]
+    weight = np.bincount(
+        links, weights=np.abs(similarity), minlength=len(cells)
+    )
+    total = np.bincount(
+        links, weights=similarity * deviations, minlength=len(cells)
+    )
+    fresh = (weight > 0) & (
+        np.bincount(inverse[len(owners):], minlength=len(cells)) == 0
+    )
+    owners, items = np.divmod(cells[fresh], width)
+    predictions = np.clip(
+        means[owners] + total[fresh] / weight[fresh], 1, settings.LEN_RATING
+    )
+    return owners, items, predictions
+
+
+def recommend_block(users):
+    """Top-N рекомендаций для блока пользователей (задание пула).
+
+    Возвращает (user_id, title_id, прогноз).
+    """
+    matrix = _shared['matrix']
+    width = len(matrix.title_ids)
+    user_pointers, user_items, user_values = matrix.by_user
+    owners, positions = expand(user_pointers, users)
+    rated = user_items[positions]
+    deviations = user_values[positions]
+    pointers, neighbours, similarity = _shared['neighbours']
+    links, positions = expand(pointers, rated)
+    owners, items, predictions = predict(
+        owners[links],
+        neighbours[positions],
+        similarity[positions],
+        deviations[links],
+        matrix.means[users],
+        owners.astype(np.int64) * width + rated,
+        width,
+    )
+    owners, items, predictions = top_per_owner(
+        owners, items, predictions, settings.RECOMMENDATIONS_SIZE
+    )
+    return (
+        matrix.user_ids[users[owners]], matrix.title_ids[items], predictions
+    )
+
+
+def recommend_all(matrix, neighbours, workers=None):
+    """Рекомендации всех пользователей: (user_id, title_id, прогноз)."""
+    items, others, similarity = neighbours
+    result = run_blocks(
+        recommend_block,
+        split(len(matrix.user_ids), USERS_PER_BLOCK),
+        workers,
+        matrix=matrix,
+        neighbours=to_csr(items, others, similarity, len(matrix.title_ids)),
+    )
+    if not result:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0)
+    return tuple(result)
+
+
+def save_neighbours(matrix, neighbours):
+    items, others, similarity = neighbours
+    TitleNeighbor.objects.all().delete()
+    for start in range(0, len(items), BATCH_SIZE):
+        stop = start + BATCH_SIZE
+        TitleNeighbor.objects.bulk_create([
+            TitleNeighbor(title_id=title_id, neighbor_id=neighbor_id,
+                          similarity=value)
+            for title_id, neighbor_id, value in zip(
+                matrix.title_ids[items[start:stop]].tolist(),
+                matrix.title_ids[others[start:stop]].tolist(),
+                similarity[start:stop].tolist(),
+            )
+        ])
+
+
+def save_recommendations(matrix, recommendations, computed_at):
+    user_ids, title_ids, scores = recommendations
+    Recommendation.objects.all().delete()
+    RecommendationState.objects.all().delete()
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        stop = start + BATCH_SIZE
+        Recommendation.objects.bulk_create([
+            Recommendation(user_id=user_id, title_id=title_id,
+                           score=round(score, 2))
+            for user_id, title_id, score in zip(
+                user_ids[start:stop].tolist(),
+                title_ids[start:stop].tolist(),
+                scores[start:stop].tolist(),
+            )
+        ])
+    RecommendationState.objects.bulk_create(
+        [
+            RecommendationState(
+                user_id=user_id, computed_at=computed_at, review_count=count
+            )
+            for user_id, count in zip(
+                matrix.user_ids.tolist(), matrix.review_counts.tolist()
+            )
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def build_recommendations(workers=None):
+    """Пересчитывает соседей и рекомендации всех пользователей."""
+    computed_at = timezone.now()
+    matrix = RatingMatrix.load()
+    neighbours = find_neighbours(matrix, workers)
+    recommendations = recommend_all(matrix, neighbours, workers)
+    with transaction.atomic():
+        save_neighbours(matrix, neighbours)
+        save_recommendations(matrix, recommendations, computed_at)
+    return len(matrix.title_ids), len(neighbours[0]), len(matrix.user_ids)
+
+
+def is_stale(user):
+    """Изменились ли отзывы пользователя после расчета рекомендаций."""
+    stats = user.reviews.filter(is_hidden=False).aggregate(
+        count=Count('pk'), last=Max('updated_at')
+    )
+    state = RecommendationState.objects.filter(user=user).first()
+    return state is None or state.review_count != stats['count'] or (
+        stats['last'] is not None and stats['last'] > state.computed_at
+    )
+
+
+@transaction.atomic
+def refresh_user(user):
+    """Пересчитывает рекомендации одного пользователя по готовым соседям."""
+    computed_at = timezone.now()
+    reviews = list(
+        user.reviews.filter(is_hidden=False).values_list('title_id', 'score')
+    )
+    Recommendation.objects.filter(user=user).delete()
+    RecommendationState.objects.update_or_create(
+        user=user,
+        defaults={'computed_at': computed_at, 'review_count': len(reviews)},
+    )
+    if not reviews:
+        return
+    rated, scores = np.array(reviews, dtype=np.int64).T
+    mean = scores.mean()
+    deviation = dict(zip(rated.tolist(), (scores - mean).tolist()))
+    links = list(
+        TitleNeighbor.objects.filter(title_id__in=deviation)
+        .values_list('title_id', 'neighbor_id', 'similarity')
+    )
+    if not links:
+        return
+    titles, neighbours, similarity = zip(*links)
+    neighbours = np.array(neighbours, dtype=np.int64)
+    width = int(max(neighbours.max(), rated.max())) + 1
+    _, items, predictions = predict(
+        np.zeros(len(links), dtype=np.int64),
+        neighbours,
+        np.array(similarity),
+        np.array([deviation[title] for title in titles]),
+        np.array([mean]),
+        rated,
+        width,
+    )
+    _, items, predictions = top_per_owner(
+        np.zeros(len(items), dtype=np.int64), items, predictions,
+        settings.RECOMMENDATIONS_SIZE,
+    )
+    Recommendation.objects.bulk_create([
+        Recommendation(user=user, title_id=title_id, score=round(score, 2))
+        for title_id, score in zip(items.tolist(), predictions.tolist())
+    ])
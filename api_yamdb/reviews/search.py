@@ -0,0 +1,176 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.models.expressions import RawSQL
+
+TITLE_SEARCH_TABLE = 'reviews_title_fts'
+REVIEW_SEARCH_TABLE = 'reviews_review_fts'
+COMMENT_SEARCH_TABLE = 'reviews_comment_fts'
+
+# Отрывок текста вокруг совпадений: маркеры, многоточие и число слов.
+SNIPPET_OPTIONS = ('<mark>', '</mark>', '…', 16)
+
+
+def build_search_sql(table, content_table, column, tokenize):
+    """SQL индекса FTS5 с внешним содержимым и триггеров, которые
+    поддерживают его при вставке, удалении и изменении колонки."""
+    return (
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+            {column},
+            content='{content_table}',
+            content_rowid='id',
+            tokenize='{tokenize}'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_ai
+        AFTER INSERT ON {content_table} BEGIN
+            INSERT INTO {table}(rowid, {column})
+            VALUES (new.id, new.{column});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_ad
+        AFTER DELETE ON {content_table} BEGIN
+            INSERT INTO {table}({table}, rowid, {column})
+            VALUES ('delete', old.id, old.{column});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_au
+        AFTER UPDATE OF {column} ON {content_table} BEGIN
+            INSERT INTO {table}({table}, rowid, {column})
+            VALUES ('delete', old.id, old.{column});
+            INSERT INTO {table}(rowid, {column})
+            VALUES (new.id, new.{column});
+        END
+        """,
+    )
+
+
+# Индекс названий: текст хранится только в теневой колонке
+# reviews_title.search_name, уже приведенной normalize_search_text.
+# Тексты отзывов и комментариев индексируются как есть, чтобы отрывки
+# показывали исходный текст: регистр и диакритику снимает токенизатор.
+SEARCH_INDEXES = {
+    TITLE_SEARCH_TABLE: (
+        'reviews_title', 'search_name', 'unicode61 remove_diacritics 0'
+    ),
+    REVIEW_SEARCH_TABLE: (
+        'reviews_review', 'text', 'unicode61 remove_diacritics 2'
+    ),
+    COMMENT_SEARCH_TABLE: (
+        'reviews_comment', 'text', 'unicode61 remove_diacritics 2'
+    ),
+}
+
+
+def normalize_search_text(value):
+    """Приводит текст к виду для поиска: casefold и замена ё на е."""
+    return (value or '').casefold().replace('ё', 'е')
+
+
+def build_match_query(value):
+    """Строит запрос FTS5, в котором каждое слово ищется как префикс."""
+    return ' '.join(
+        '"{}"*'.format(word.replace('"', '""'))
+        for word in normalize_search_text(value).split()
+    )
+
+
+def build_text_match_query(value):
+    """Запрос FTS5 по тексту: каждое слово ищется как префикс.
+
+    Регистр снимает токенизатор, поэтому слова не нормализуются и ё с е
+    различаются.
+    """
+    return ' '.join(
+        '"{}"*'.format(word.replace('"', '""')) for word in value.split()
+    )
+
+
+def has_search_index(using='default'):
+    return connections[using].vendor == 'sqlite'
+
+
+# Запись без изменений: берет блокировку записи SQLite, как BEGIN
+# IMMEDIATE, который Django 3.2 не умеет открывать.
+WRITE_LOCK_SQL = 'UPDATE reviews_title SET id = id WHERE 0'
+
+
+@contextmanager
+def write_atomic(using=DEFAULT_DB_ALIAS):
+    """transaction.atomic() для записи в таблицы с FTS5-индексами.
+
+    Триггер FTS5 читает индекс до записи в него. Транзакция SQLite,
+    которая начинается с такого чтения при чужой незавершенной записи,
+    сразу получает «database is locked»: SQLite не ждет, чтобы избежать
+    взаимной блокировки. Поэтому внешняя транзакция первым запросом
+    берет блокировку записи и ждет ее не дольше timeout.
+    """
+    connection = transaction.get_connection(using)
+    outermost = not connection.in_atomic_block
+    with transaction.atomic(using=using):
+        if outermost and has_search_index(using):
+            with connection.cursor() as cursor:
+                cursor.execute(WRITE_LOCK_SQL)
+        yield
+
+
+def ensure_search_indexes(using='default', **kwargs):
+    """Создает FTS5-индексы и их триггеры, если их нет.
+
+    SQLite пересоздает таблицу при изменении схемы и теряет триггеры,
+    поэтому проверка выполняется после каждого migrate; пересозданный
+    индекс заполняется заново.
+    """
+    if not has_search_index(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type IN ('table', 'trigger') AND name LIKE 'reviews_%'"
+        )
+        names = {row[0] for row in cursor.fetchall()}
+        for table, (content_table, column, tokenize) in (
+            SEARCH_INDEXES.items()
+        ):
+            if content_table not in names:
+                continue
+            triggers = {f'{table}_{suffix}' for suffix in ('ai', 'ad', 'au')}
+            if table in names and triggers <= names:
+                continue
+            for statement in build_search_sql(
+                table, content_table, column, tokenize
+            ):
+                cursor.execute(statement)
+            cursor.execute(
+                f"INSERT INTO {table}({table}) VALUES ('rebuild')"
+            )
+
+
+def snippet(table):
+    """Отрывок текста с подсвеченными совпадениями для запроса MATCH.
+
+    Таблица индекса должна участвовать в запросе под своим именем, как
+    при фильтре search__text__match.
+    """
+    return RawSQL(
+        f'snippet({table}, 0, %s, %s, %s, %s)', SNIPPET_OPTIONS,
+        output_field=models.TextField(),
+    )
+
+
+class SearchField(models.TextField):
+    """Колонка полнотекстового индекса."""
+
+
+@SearchField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
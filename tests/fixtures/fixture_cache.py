@@ -0,0 +1,22 @@
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+
+@pytest.fixture(scope='session', autouse=True)
+def cache_location(tmp_path_factory):
+    """Файловый кэш тестов во временном каталоге, а не в кэше проекта."""
+    from django.conf import settings
+
+    location = str(tmp_path_factory.mktemp('cache'))
+    with override_settings(CACHES={
+        'default': {**settings.CACHES['default'], 'LOCATION': location},
+    }):
+        yield location
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(cache_location):
+    cache.clear()
+    yield
+    cache.clear()
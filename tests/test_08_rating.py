@@ -0,0 +1,136 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import (
+    create_single_comment,
+    create_single_review,
+    create_titles,
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08RatingAPI:
+
+    def test_01_rating_follows_review_writes(self, client, admin_client,
+                                             user_client, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        create_single_review(admin_client, titles[0]['id'], 'Шедевр', 10)
+        response = create_single_review(
+            user_client, titles[0]['id'], 'Так себе', 4
+        )
+        review_id = response.json()['id']
+
+        data = client.get(url).json()
+        assert data.get('rating') == 7, (
+            'Проверьте, что после создания отзывов рейтинг произведения '
+            'равен средней оценке.'
+        )
+
+        response = user_client.patch(
+            f'{url}reviews/{review_id}/', data={'score': 8}
+        )
+        assert response.status_code == HTTPStatus.OK
+        data = client.get(url).json()
+        assert data.get('rating') == 9, (
+            'Проверьте, что изменение оценки в отзыве пересчитывает '
+            'рейтинг произведения.'
+        )
+
+        response = moderator_client.delete(f'{url}reviews/{review_id}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        data = client.get(url).json()
+        assert data.get('rating') == 10, (
+            'Проверьте, что удаление отзыва пересчитывает рейтинг '
+            'произведения.'
+        )
+
+    def test_02_recalculate_ratings(self, admin_client, user_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Шедевр', 10)
+        create_single_review(user_client, titles[0]['id'], 'Плохо', 2)
+        Title.objects.update(rating_sum=0, review_count=0, rating=None)
+
+        Title.recalculate_ratings()
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.review_count, title.rating) == (
+            12, 2, 6
+        ), (
+            'Проверьте, что `Title.recalculate_ratings` восстанавливает '
+            'сумму оценок, число отзывов и рейтинг по таблице отзывов.'
+        )
+        title = Title.objects.get(pk=titles[1]['id'])
+        assert (title.review_count, title.rating) == (0, None)
+
+    def test_03_user_deletion_updates_counters(self, client, admin_client,
+                                               user_client, moderator_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        create_single_review(user_client, titles[0]['id'], 'Шедевр', 9)
+        create_single_review(moderator_client, titles[0]['id'], 'Слабо', 3)
+        review_id = create_single_review(
+            admin_client, titles[1]['id'], 'Неплохо', 5
+        ).json()['id']
+        for author in (user_client, user_client, moderator_client):
+            create_single_comment(
+                author, titles[1]['id'], review_id, 'Комментарий'
+            )
+        client.get(url)
+        client.get(f'/api/v1/titles/{titles[1]["id"]}/reviews/')
+
+        response = admin_client.delete('/api/v1/users/TestUser/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+        data = client.get(url).json()
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.review_count, title.rating_sum, data['rating']) == (
+            1, 3, 3
+        ), (
+            'Проверьте, что удаление пользователя пересчитывает рейтинг и '
+            'число отзывов произведений, на которые он писал отзывы.'
+        )
+        assert data['scores'] == [0, 0, 1, 0, 0, 0, 0, 0, 0, 0], (
+            'Проверьте, что удаление пользователя пересчитывает гистограмму '
+            'оценок.'
+        )
+        Title.recalculate_ratings()
+        assert Title.objects.get(pk=titles[0]['id']).weighted_rating == (
+            title.weighted_rating
+        ), 'Проверьте, что пересчитывается и взвешенный рейтинг.'
+
+        review = client.get(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        ).json()['results'][0]
+        assert review['comment_count'] == 1, (
+            'Проверьте, что удаление пользователя пересчитывает '
+            '`comment_count` отзывов, которые он комментировал.'
+        )
+
+    def test_04_title_save_keeps_counters(self, admin_client, user_client):
+        from api.serializers import TitleSerializer
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        # Произведение загружено до отзыва, как в пересекающемся PATCH.
+        title = Title.objects.get(pk=titles[0]['id'])
+        create_single_review(user_client, title.pk, 'Шедевр', 8)
+        serializer = TitleSerializer(
+            title, data={'name': 'Новое название'}, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        title = Title.objects.get(pk=title.pk)
+        assert title.name == 'Новое название'
+        assert (title.review_count, title.rating_sum, title.rating) == (
+            1, 8, 8
+        ), (
+            'Проверьте, что сохранение произведения не перезаписывает '
+            'счетчики рейтинга, измененные после его загрузки.'
+        )
+        assert title.weighted_rating is not None
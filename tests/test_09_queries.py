@@ -0,0 +1,54 @@
+import pytest
+
+from tests.utils import create_comments, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueriesAPI:
+
+    def test_01_titles_list_queries(self, client, admin_client,
+                                    django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        for year in range(1990, 2000):
+            admin_client.post('/api/v1/titles/', data={
+                'name': f'Произведение {year}',
+                'year': year,
+                'genre': titles[0]['genre'],
+                'category': titles[0]['category'],
+            })
+
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/')
+        assert len(response.json()['results']) == 10, (
+            'Проверьте, что список произведений загружает жанры и категории '
+            'фиксированным числом запросов: count, страница и prefetch '
+            'жанров.'
+        )
+
+    def test_02_reviews_and_comments_list_queries(
+        self, client, admin_client, admin, user_client, user,
+        moderator_client, moderator, django_assert_num_queries
+    ):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, reviews, titles = create_comments(admin_client, author_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        with django_assert_num_queries(3):
+            client.get(url)
+        with django_assert_num_queries(3):
+            client.get(f'{url}{reviews[0]["id"]}/comments/')
+
+    @pytest.mark.parametrize('url', ('/api/v1/categories/', '/api/v1/genres/'))
+    def test_03_reference_list_queries(self, client, admin_client, url,
+                                       django_assert_num_queries,
+                                       django_assert_max_num_queries):
+        create_titles(admin_client)
+        # Справочник читается из базы одним запросом, затем из памяти.
+        with django_assert_max_num_queries(1):
+            client.get(url)
+        with django_assert_num_queries(0):
+            client.get(url, {'page': 2})
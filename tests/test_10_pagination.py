@@ -0,0 +1,69 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+def create_many_titles(admin_client, count):
+    titles, categories, genres = create_titles(admin_client)
+    for idx in range(count):
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': f'Произведение {idx % 3}',
+            'year': 1950 + idx % 7,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        titles.append(response.json())
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10TitleCursorPaginationAPI:
+
+    def test_01_cursor_walks_whole_catalogue(self, client, admin_client):
+        titles = create_many_titles(admin_client, 23)
+        expected = [
+            title['id'] for title in sorted(
+                titles, key=lambda t: (-t['year'], t['name'], t['id'])
+            )
+        ]
+
+        url = '/api/v1/titles/?pagination=cursor'
+        seen = []
+        pages = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в режиме курсора не выполняется COUNT(*).'
+            )
+            seen.extend(title['id'] for title in data['results'])
+            pages.append(url)
+            url = data['next']
+        assert seen == expected, (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` проходит '
+            'весь каталог без пропусков и повторов в порядке '
+            '(-year, name, id).'
+        )
+
+        data = client.get(pages[-1]).json()
+        previous = client.get(data['previous']).json()
+        assert [title['id'] for title in previous['results']] == (
+            expected[-len(data['results']) - 10:-len(data['results'])]
+        ), (
+            'Проверьте, что ссылка `previous` курсорной пагинации '
+            'возвращает предыдущую страницу.'
+        )
+
+    def test_02_page_number_mode_is_default(self, client, admin_client):
+        create_many_titles(admin_client, 12)
+        data = client.get('/api/v1/titles/?page=2').json()
+        assert data['count'] == 14 and len(data['results']) == 4
+
+    def test_03_invalid_cursor(self, client, admin_client):
+        create_titles(admin_client)
+        response = client.get('/api/v1/titles/?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND
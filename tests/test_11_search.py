@@ -0,0 +1,76 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_categories, create_genre
+
+
+def create_named_titles(admin_client, names):
+    genres = create_genre(admin_client)
+    categories = create_categories(admin_client)
+    result = []
+    for name in names:
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': name,
+            'year': 1975,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        result.append(response.json())
+    return result
+
+
+def result_names(response):
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleSearchAPI:
+
+    def test_01_search_is_unicode_aware(self, client, admin_client):
+        create_named_titles(admin_client, (
+            'Ёжик в тумане', 'ТУМАН', 'Солярис'
+        ))
+        url = '/api/v1/titles/'
+
+        names = result_names(client.get(f'{url}?search=туман'))
+        assert names == ['ТУМАН', 'Ёжик в тумане'], (
+            f'Проверьте, что параметр `search` эндпоинта `{url}` ищет по '
+            'словам названия без учета регистра и сортирует результаты по '
+            'релевантности.'
+        )
+        assert result_names(client.get(f'{url}?search=ежик ТУМ')) == [
+            'Ёжик в тумане'
+        ], (
+            f'Проверьте, что параметр `search` эндпоинта `{url}` не '
+            'различает `ё` и `е` и ищет слова по префиксу.'
+        )
+        assert result_names(client.get(f'{url}?name=ёЖИК')) == [
+            'Ёжик в тумане'
+        ], (
+            f'Проверьте, что фильтр `name` эндпоинта `{url}` не учитывает '
+            'регистр кириллицы.'
+        )
+        assert result_names(client.get(f'{url}?search="')) == []
+
+    def test_02_search_index_follows_writes(self, client, admin_client):
+        titles = create_named_titles(admin_client, ('Сталкер', 'Зеркало'))
+        url = '/api/v1/titles/'
+
+        admin_client.patch(
+            f'{url}{titles[0]["id"]}/', data={'name': 'Солярис'}
+        )
+        assert result_names(client.get(f'{url}?search=сталкер')) == []
+        assert result_names(client.get(f'{url}?search=солярис')) == [
+            'Солярис'
+        ], (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'названия произведения.'
+        )
+
+        admin_client.delete(f'{url}{titles[1]["id"]}/')
+        assert result_names(client.get(f'{url}?search=зеркало')) == [], (
+            'Проверьте, что поисковый индекс обновляется при удалении '
+            'произведения.'
+        )
@@ -0,0 +1,91 @@
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ResponseCacheAPI:
+
+    def test_01_anonymous_reads_are_cached(self, client, admin_client,
+                                           django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        urls = (
+            '/api/v1/titles/',
+            '/api/v1/titles/?year=1984',
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            '/api/v1/genres/',
+            '/api/v1/categories/',
+        )
+        for url in urls:
+            expected = client.get(url).json()
+            with django_assert_num_queries(0):
+                response = client.get(url)
+            assert response.json() == expected, (
+                f'Проверьте, что повторный анонимный GET-запрос к `{url}` '
+                'отдается из кэша без запросов к базе.'
+            )
+        with django_assert_num_queries(0):
+            client.get('/api/v1/titles/?page=1')
+
+    def test_02_writes_invalidate_cache(self, client, admin_client,
+                                        user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url).json()['rating'] is None
+
+        create_single_review(user_client, titles[0]['id'], 'Отлично', 8)
+        assert client.get(url).json()['rating'] == 8, (
+            'Проверьте, что публикация отзыва сбрасывает кэш произведения.'
+        )
+
+        admin_client.post(
+            '/api/v1/genres/', data={'name': 'Вестерн', 'slug': 'western'}
+        )
+        slugs = [
+            genre['slug']
+            for genre in client.get('/api/v1/genres/').json()['results']
+        ]
+        assert 'western' in slugs, (
+            'Проверьте, что создание жанра сбрасывает кэш списка жанров.'
+        )
+
+        admin_client.patch(url, data={'genre': ['western']})
+        genres = client.get(url).json()['genre']
+        assert genres == [{'name': 'Вестерн', 'slug': 'western'}], (
+            'Проверьте, что изменение жанров произведения сбрасывает кэш.'
+        )
+
+    def test_03_authenticated_reads_bypass_cache(self, admin_client):
+        create_titles(admin_client)
+        data = admin_client.get('/api/v1/titles/').json()
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Новое', 'year': 2000, 'genre': ['horror'],
+            'category': 'films',
+        })
+        assert admin_client.get('/api/v1/titles/').json()['count'] == (
+            data['count'] + 1
+        )
+
+    def test_04_versions_never_repeat(self, monkeypatch):
+        from django.core.cache import caches
+
+        from api.cache import bump_version, get_versions
+
+        resource = 'reviews.title'
+        seen = [get_versions((resource,))[0]]
+        for _ in range(3):
+            bump_version(resource)
+            seen.append(get_versions((resource,))[0])
+        # Медленный воркер прочитал версию до чужих изменений и пишет
+        # свою поверх них.
+        backend = caches['default']
+        monkeypatch.setattr(
+            backend, 'get', lambda *args, **kwargs: seen[1]
+        )
+        bump_version(resource)
+        monkeypatch.undo()
+        version = get_versions((resource,))[0]
+        assert version not in seen, (
+            'Проверьте, что смена версии в одном процессе не возвращает '
+            'версию, под которой уже закэшированы ответы.'
+        )
@@ -0,0 +1,116 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import (create_comments, create_single_comment,
+                         create_single_review, create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ConditionalGetAPI:
+
+    def test_01_reviews_etag(self, client, admin_client, user_client,
+                             django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        create_single_review(admin_client, titles[0]['id'], 'Хорошо', 7)
+
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag and response['Last-Modified'], (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает 304 без запросов к базе.'
+        )
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        other_url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        other_etag = client.get(other_url)['ETag']
+
+        create_single_review(user_client, titles[0]['id'], 'Плохо', 2)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что новый отзыв меняет `ETag` списка `{url}`.'
+        )
+        assert response['ETag'] != etag
+        assert len(response.json()['results']) == 2
+
+        response = client.get(other_url, HTTP_IF_NONE_MATCH=other_etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что отзыв к одному произведению не меняет `ETag` '
+            'отзывов другого.'
+        )
+
+    def test_02_comments_etag(self, client, admin_client, admin,
+                              user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        _, reviews, titles = create_comments(admin_client, author_map)
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        etag = client.get(url)['ETag']
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == (
+            HTTPStatus.NOT_MODIFIED
+        )
+
+        create_single_comment(
+            user_client, titles[0]['id'], reviews[0]['id'], 'Согласен'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что новый комментарий меняет `ETag` списка `{url}`.'
+        )
+
+        etag = response['ETag']
+        admin_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_etag_follows_names(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review_id = create_single_review(
+            user_client, title_id, 'Хорошо', 7
+        ).json()['id']
+        create_single_comment(user_client, title_id, review_id, 'Согласен')
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        comments_url = f'{reviews_url}{review_id}/comments/'
+
+        for change_url, data, urls in (
+            (f'/api/v1/titles/{title_id}/', {'name': 'Старое название'},
+             (reviews_url,)),
+            ('/api/v1/titles/bulk/', [
+                {'id': title_id, 'name': 'Новое название'}
+            ], (reviews_url,)),
+            ('/api/v1/users/TestUser/', {'username': 'Renamed'},
+             (reviews_url, comments_url)),
+        ):
+            etags = [client.get(url)['ETag'] for url in urls]
+            if isinstance(data, list):
+                response = admin_client.post(
+                    change_url, data=data, format='json'
+                )
+            else:
+                response = admin_client.patch(change_url, data=data)
+            assert response.status_code in (
+                HTTPStatus.OK, HTTPStatus.CREATED
+            )
+            for url, etag in zip(urls, etags):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                assert response.status_code == HTTPStatus.OK, (
+                    f'Проверьте, что изменение `{change_url}` меняет '
+                    f'`ETag` ответа `{url}`, в котором оно видно.'
+                )
+        results = client.get(reviews_url).json()['results']
+        assert results[0]['title'] == 'Новое название'
+        assert results[0]['author'] == 'Renamed'
@@ -0,0 +1,57 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14TitleFacetsAPI:
+
+    def test_01_facets(self, client, admin_client,
+                       django_assert_num_queries):
+        _, categories, genres = create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Титаник',
+            'year': 1997,
+            'genre': [genres[1]['slug'], genres[2]['slug']],
+            'category': categories[0]['slug'],
+        })
+        url = '/api/v1/titles/facets/'
+
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{url}` не найден или недоступен анонимно.'
+        )
+        data = response.json()
+        assert {row['slug']: row['count'] for row in data['genre']} == {
+            'horror': 1, 'comedy': 2, 'drama': 2
+        }, f'Проверьте подсчет произведений по жанрам в `{url}`.'
+        assert {row['slug']: row['count'] for row in data['category']} == {
+            'films': 2, 'books': 1
+        }, f'Проверьте подсчет произведений по категориям в `{url}`.'
+        assert data['year'] == [
+            {'year': 1997, 'count': 1},
+            {'year': 1988, 'count': 1},
+            {'year': 1984, 'count': 1},
+        ], f'Проверьте подсчет произведений по годам в `{url}`.'
+
+        data = client.get(f'{url}?category=films').json()
+        assert {row['slug']: row['count'] for row in data['genre']} == {
+            'horror': 1, 'comedy': 2, 'drama': 1
+        }, (
+            f'Проверьте, что `{url}` учитывает параметры фильтрации '
+            'произведений.'
+        )
+
+        with django_assert_num_queries(0):
+            client.get(f'{url}?category=films')
+
+        admin_client.delete('/api/v1/genres/drama/')
+        data = client.get(f'{url}?category=films').json()
+        assert 'drama' not in [row['slug'] for row in data['genre']], (
+            f'Проверьте, что кэш `{url}` сбрасывается при изменении жанров.'
+        )
+
+        response = client.get(f'{url}?year=abc')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,55 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15LeaderboardAPI:
+
+    def test_01_top_uses_bayesian_rating(self, client, admin_client,
+                                         user_client, moderator_client):
+        titles, categories, _ = create_titles(admin_client)
+        url = '/api/v1/titles/top/'
+        create_single_review(admin_client, titles[0]['id'], 'Шедевр', 10)
+        for author_client in (admin_client, user_client, moderator_client):
+            create_single_review(
+                author_client, titles[1]['id'], 'Очень хорошо', 9
+            )
+
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{url}` не найден или недоступен анонимно.'
+        )
+        data = response.json()
+        assert [title['id'] for title in data] == [
+            titles[1]['id'], titles[0]['id']
+        ], (
+            f'Проверьте, что `{url}` сортирует произведения по байесовской '
+            'оценке: одна высокая оценка не должна опережать несколько '
+            'почти таких же.'
+        )
+        assert data[0]['rating'] == 9
+        assert round(data[0]['weighted_rating'], 3) == round(87 / 13, 3)
+
+        data = client.get(f'{url}?category={categories[0]["slug"]}').json()
+        assert [title['id'] for title in data] == [titles[0]['id']], (
+            f'Проверьте, что `{url}` фильтруется по категории.'
+        )
+
+    def test_02_rebuild_leaderboard(self, admin_client, user_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Хорошо', 8)
+        Title.objects.update(weighted_rating=None)
+
+        call_command('rebuild_leaderboard')
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert round(title.weighted_rating, 3) == round(68 / 11, 3), (
+            'Проверьте, что команда `rebuild_leaderboard` пересчитывает '
+            'взвешенный рейтинг.'
+        )
+        assert Title.objects.get(pk=titles[1]['id']).weighted_rating is None
@@ -0,0 +1,60 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_reviews, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16SparseFieldsAPI:
+
+    def test_01_titles_fields(self, client, admin_client):
+        create_titles(admin_client)
+        url = '/api/v1/titles/'
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'{url}?fields=id,name')
+        assert response.status_code == HTTPStatus.OK
+        assert all(
+            set(title) == {'id', 'name'}
+            for title in response.json()['results']
+        ), f'Проверьте, что `{url}?fields=` оставляет только указанные поля.'
+        assert len(context.captured_queries) == 2, (
+            f'Проверьте, что `{url}?fields=` без `genre` не загружает жанры.'
+        )
+        assert not any(
+            'description' in query['sql']
+            for query in context.captured_queries
+        ), (
+            f'Проверьте, что `{url}?fields=` не читает из базы '
+            'невостребованные колонки.'
+        )
+
+        data = client.get(f'{url}?omit=genre,description').json()
+        assert set(data['results'][0]) == {
+            'id', 'name', 'year', 'rating', 'category'
+        }, f'Проверьте, что `{url}?omit=` убирает указанные поля.'
+
+        response = client.get(f'{url}?fields=name,unknown')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_cursor_with_fields(self, client, admin_client,
+                                   django_assert_num_queries):
+        create_titles(admin_client)
+        with django_assert_num_queries(1):
+            response = client.get(
+                '/api/v1/titles/?pagination=cursor&fields=name'
+            )
+        assert len(response.json()['results']) == 2
+
+    def test_03_reviews_fields(self, client, admin_client, admin,
+                               user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = client.get(f'{url}?fields=text,score').json()
+        assert [set(review) for review in data['results']] == [
+            {'text', 'score'}, {'text', 'score'}
+        ], f'Проверьте, что `{url}?fields=` оставляет только указанные поля.'
@@ -0,0 +1,154 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17BulkTitlesAPI:
+    url = '/api/v1/titles/bulk/'
+
+    def test_01_bulk_create_and_update(self, client, admin_client,
+                                       django_assert_max_num_queries):
+        titles, categories, genres = create_titles(admin_client)
+        data = [
+            {
+                'name': f'Сериал {idx}',
+                'year': 1950 + idx,
+                'genre': [genres[0]['slug'], genres[2]['slug']],
+                'category': categories[1]['slug'],
+            }
+            for idx in range(50)
+        ]
+        data.append({
+            'id': titles[0]['id'],
+            'name': 'Терминатор 2',
+            'genre': [genres[2]['slug']],
+        })
+
+        with django_assert_max_num_queries(15):
+            response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что POST-запрос администратора к `{self.url}` с '
+            'корректными данными возвращает ответ со статусом 201.'
+        )
+        result = response.json()
+        assert len(result['created']) == 50
+        assert result['updated'] == [titles[0]['id']]
+
+        title = client.get(f'/api/v1/titles/{result["created"][7]}/').json()
+        assert title['name'] == 'Сериал 7' and title['year'] == 1957
+        assert {genre['slug'] for genre in title['genre']} == {
+            genres[0]['slug'], genres[2]['slug']
+        }, 'Проверьте, что пакетная запись связывает произведения с жанрами.'
+        assert title['category'] == categories[1]
+
+        title = client.get(f'/api/v1/titles/{titles[0]["id"]}/').json()
+        assert title['name'] == 'Терминатор 2' and title['year'] == 1984
+        assert [genre['slug'] for genre in title['genre']] == [
+            genres[2]['slug']
+        ], 'Проверьте, что пакетное обновление заменяет жанры произведения.'
+        response = client.get('/api/v1/titles/?search=сериал')
+        assert response.json()['count'] == 50, (
+            'Проверьте, что пакетная запись обновляет поисковый индекс и '
+            'кэш ответов.'
+        )
+
+    def test_02_bulk_per_item_errors(self, admin_client, user_client):
+        _, categories, genres = create_titles(admin_client)
+        data = [
+            {'name': 'Ок', 'year': 1990, 'genre': [genres[0]['slug']],
+             'category': categories[0]['slug']},
+            {'name': 'Нет жанра', 'year': 1990, 'genre': ['unknown'],
+             'category': categories[0]['slug']},
+            {'name': 'Из будущего', 'year': 3000, 'genre': [],
+             'category': categories[0]['slug']},
+            {'id': 999, 'name': 'Нет такого'},
+        ]
+        response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.MULTI_STATUS
+        result = response.json()
+        assert len(result['created']) == 1
+        assert [error['index'] for error in result['errors']] == [1, 2, 3], (
+            f'Проверьте, что `{self.url}` возвращает ошибки по индексам '
+            'элементов и записывает только корректные.'
+        )
+        assert 'genre' in result['errors'][0]['errors']
+
+        response = user_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        response = admin_client.post(
+            self.url, data={'name': 'x'}, format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_duplicate_ids(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        title_id = titles[0]['id']
+        data = [
+            {'id': title_id, 'genre': [genres[0]['slug']]},
+            {'id': title_id, 'name': 'Повтор', 'genre': [genres[0]['slug']]},
+            {'name': 'Новое', 'year': 2000, 'genre': [genres[1]['slug']],
+             'category': categories[0]['slug']},
+        ]
+        response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.MULTI_STATUS, (
+            f'Проверьте, что повтор id в пакете `{self.url}` не приводит к '
+            'ошибке сервера.'
+        )
+        result = response.json()
+        assert result['updated'] == [title_id]
+        assert [error['index'] for error in result['errors']] == [1], (
+            'Проверьте, что повтор id отклоняется как ошибка элемента.'
+        )
+        assert 'id' in result['errors'][0]['errors']
+
+        title = client.get(f'/api/v1/titles/{title_id}/').json()
+        assert title['name'] != 'Повтор'
+        assert [genre['slug'] for genre in title['genre']] == [
+            genres[0]['slug']
+        ]
+        created = client.get(f'/api/v1/titles/{result["created"][0]}/')
+        assert created.json()['name'] == 'Новое', (
+            'Проверьте, что id созданных произведений в ответе совпадают с '
+            'записанными.'
+        )
+
+    def test_04_large_batch_without_signals(self, admin_client,
+                                            django_assert_max_num_queries):
+        from django.db.models.signals import post_save
+        from reviews.models import Title
+
+        _, categories, genres = create_titles(admin_client)
+        data = [
+            {'name': f'Выпуск {idx}', 'year': 2000,
+             'genre': [genres[0]['slug']], 'category': categories[0]['slug']}
+            for idx in range(450)
+        ]
+        saved = []
+
+        def receiver(**kwargs):
+            saved.append(kwargs['instance'])
+
+        post_save.connect(receiver, sender=Title)
+        try:
+            with django_assert_max_num_queries(25):
+                response = admin_client.post(
+                    self.url, data=data, format='json'
+                )
+        finally:
+            post_save.disconnect(receiver, sender=Title)
+        assert response.status_code == HTTPStatus.CREATED
+        assert not saved, (
+            'Проверьте, что пакетная запись вставляет произведения без '
+            'сигналов моделей, по одному сбросу кэша на пакет.'
+        )
+        created = response.json()['created']
+        names = Title.objects.in_bulk(created)
+        assert [names[pk].name for pk in created] == [
+            item['name'] for item in data
+        ], (
+            'Проверьте, что id созданных произведений в ответе совпадают с '
+            'записанными во всех порциях вставки.'
+        )
@@ -0,0 +1,61 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18ExpandReviewsAPI:
+
+    def test_01_expand_latest_reviews(self, client, admin_client, admin,
+                                      user_client, user,
+                                      django_assert_num_queries):
+        author_map = {admin: admin_client, user: user_client}
+        reviews, titles = create_reviews(admin_client, author_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+
+        with django_assert_num_queries(4):
+            response = client.get(f'{url}?expand=reviews')
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert [review['id'] for review in data.get('reviews', ())] == [
+            reviews[1]['id'], reviews[0]['id']
+        ], (
+            f'Проверьте, что `{url}?expand=reviews` возвращает отзывы '
+            'к произведению от новых к старым.'
+        )
+        assert data['reviews'][0] == {
+            'id': reviews[1]['id'],
+            'author': user.username,
+            'text': reviews[1]['text'],
+            'score': 5,
+            'pub_date': data['reviews'][0]['pub_date'],
+        }, f'Проверьте поля отзывов в ответе `{url}?expand=reviews`.'
+
+        data = client.get(f'{url}?expand=reviews[:1]').json()
+        assert [review['id'] for review in data['reviews']] == [
+            reviews[1]['id']
+        ], f'Проверьте, что `{url}?expand=reviews[:N]` отдает N отзывов.'
+        assert 'reviews' not in client.get(url).json()
+
+        for value in ('comments', 'reviews[:0]', 'reviews[:1000]'):
+            response = client.get(f'{url}?expand={value}')
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что `{url}?expand={value}` возвращает 400.'
+            )
+
+    def test_02_expanded_reviews_follow_writes(self, client, admin_client,
+                                               admin, user_client):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/?expand=reviews'
+        assert len(client.get(url).json()['reviews']) == 1
+
+        create_single_review(user_client, titles[0]['id'], 'новый', 7)
+        data = client.get(url).json()
+        assert [review['text'] for review in data['reviews']] == [
+            'новый', reviews[0]['text']
+        ], (
+            'Проверьте, что кэшированный ответ с `?expand=reviews` '
+            'обновляется после создания отзыва.'
+        )
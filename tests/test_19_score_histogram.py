@@ -0,0 +1,79 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_reviews, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19ScoreHistogramAPI:
+
+    def test_01_histogram_follows_reviews(self, client, admin_client, admin,
+                                          user_client, moderator_client):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        reviews_url = f'{url}reviews/'
+
+        data = client.get(url).json()
+        assert data.get('scores') == [0, 0, 0, 0, 1, 0, 0, 0, 0, 0], (
+            f'Проверьте, что ответ `{url}` содержит гистограмму оценок '
+            '`scores` из десяти счетчиков.'
+        )
+
+        review = create_single_review(
+            user_client, titles[0]['id'], 'текст', 9
+        ).json()
+        create_single_review(moderator_client, titles[0]['id'], 'текст', 9)
+        assert client.get(url).json()['scores'] == [
+            0, 0, 0, 0, 1, 0, 0, 0, 2, 0
+        ], 'Проверьте, что гистограмма учитывает новые отзывы.'
+
+        user_client.patch(
+            f'{reviews_url}{review["id"]}/', data={'score': 1}
+        )
+        assert client.get(url).json()['scores'] == [
+            1, 0, 0, 0, 1, 0, 0, 0, 1, 0
+        ], 'Проверьте, что гистограмма учитывает изменение оценки.'
+
+        user_client.delete(f'{reviews_url}{review["id"]}/')
+        assert client.get(url).json()['scores'] == [
+            0, 0, 0, 0, 1, 0, 0, 0, 1, 0
+        ], 'Проверьте, что гистограмма учитывает удаление отзыва.'
+
+    def test_02_batch_histograms(self, client, admin_client, admin,
+                                 django_assert_max_num_queries):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        url = '/api/v1/titles/scores/'
+        with django_assert_max_num_queries(2):
+            response = client.get(
+                f'{url}?ids={titles[0]["id"]},{titles[1]["id"]},999'
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {
+            str(titles[0]['id']): [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+            str(titles[1]['id']): [0] * 10,
+        }, (
+            f'Проверьте, что `{url}?ids=` возвращает гистограммы '
+            'существующих произведений.'
+        )
+        too_many = ','.join(map(str, range(1, 200)))
+        for query in ('', '?ids=abc', f'?ids={too_many}'):
+            response = client.get(f'{url}{query}')
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_rebuild_command(self, client, admin_client, admin,
+                                user_client, user):
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        from reviews.models import TitleScore
+        TitleScore.objects.all().delete()
+        call_command('rebuild_score_histograms')
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url).json()['scores'] == [
+            0, 0, 0, 0, 2, 0, 0, 0, 0, 0
+        ], (
+            'Проверьте, что команда `rebuild_score_histograms` '
+            'пересчитывает гистограммы по отзывам.'
+        )
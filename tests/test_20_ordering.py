@@ -0,0 +1,83 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+
+from tests.test_10_pagination import create_many_titles
+from tests.utils import create_single_review
+
+
+def walk(client, url):
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        ids.extend(title['id'] for title in data['results'])
+        url = data['next']
+    return ids
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20TitleOrderingAPI:
+    url = '/api/v1/titles/'
+
+    def test_01_ordering_by_indexed_fields(self, client, admin_client,
+                                           user_client, moderator_client):
+        titles = create_many_titles(admin_client, 13)
+        for title, score in zip(titles[:4], (3, 9, 3, 7)):
+            create_single_review(user_client, title['id'], 'текст', score)
+        create_single_review(moderator_client, titles[1]['id'], 'текст', 1)
+
+        for ordering, key in (
+            ('year', lambda t: (t['year'], t['id'])),
+            ('-year', lambda t: (-t['year'], -t['id'])),
+            ('name', lambda t: (t['name'], t['id'])),
+        ):
+            expected = [title['id'] for title in sorted(titles, key=key)]
+            assert walk(
+                client, f'{self.url}?ordering={ordering}&pagination=cursor'
+            ) == expected, (
+                f'Проверьте, что `{self.url}?ordering={ordering}` сортирует '
+                'произведения с id в качестве последнего ключа в обоих '
+                'режимах пагинации.'
+            )
+            data = client.get(f'{self.url}?ordering={ordering}').json()
+            assert [
+                title['id'] for title in data['results']
+            ] == expected[:10]
+
+        expected = [titles[3]['id'], titles[1]['id'], titles[2]['id'],
+                    titles[0]['id']]
+        assert walk(client, f'{self.url}?ordering=-rating') == expected, (
+            f'Проверьте, что `{self.url}?ordering=-rating` сортирует '
+            'произведения с отзывами по рейтингу.'
+        )
+        assert walk(
+            client, f'{self.url}?ordering=rating&pagination=cursor'
+        ) == expected[::-1]
+        ids = walk(client, f'{self.url}?ordering=-review_count')
+        assert ids[0] == titles[1]['id'] and len(ids) == len(titles)
+
+    def test_02_unindexed_ordering_is_rejected(self, client, admin_client):
+        create_many_titles(admin_client, 1)
+        for ordering in ('description', 'rating,name', 'genre', '?'):
+            response = client.get(f'{self.url}?ordering={ordering}')
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что `{self.url}?ordering={ordering}` '
+                'возвращает 400.'
+            )
+
+    @pytest.mark.skipif(
+        connection.vendor != 'sqlite', reason='План запроса SQLite.'
+    )
+    def test_03_orderings_use_indexes(self):
+        from api.filters import TITLE_ORDERINGS
+        from reviews.models import Title
+
+        for ordering in TITLE_ORDERINGS.values():
+            plan = Title.objects.order_by(*ordering)[:10].explain()
+            assert 'TEMP B-TREE' not in plan, (
+                f'Сортировка {ordering} должна читаться по индексу, а не '
+                f'сортировать всю таблицу: {plan}'
+            )
@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import IntegrityError, transaction
+
+from tests.utils import create_categories, create_genre
+
+
+def create_genre_titles(admin_client):
+    genres = [genre['slug'] for genre in create_genre(admin_client)]
+    category = create_categories(admin_client)[0]['slug']
+    titles = {}
+    for name, slugs in (
+        ('Один', genres[:1]),
+        ('Два', genres[1:2]),
+        ('Оба', genres[:2]),
+        ('Все', genres),
+    ):
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': name,
+            'year': 1990,
+            'genre': slugs,
+            'category': category,
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        titles[name] = response.json()['id']
+    return titles, genres
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21GenreFilterAPI:
+    url = '/api/v1/titles/'
+
+    def names(self, client, query):
+        response = client.get(f'{self.url}?{query}')
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert data['count'] == len(data['results'])
+        return sorted(title['name'] for title in data['results'])
+
+    def test_01_any_and_all(self, client, admin_client):
+        _, genres = create_genre_titles(admin_client)
+        first, second = genres[0], genres[1]
+
+        assert self.names(client, f'genre={first}') == [
+            'Все', 'Оба', 'Один'
+        ]
+        assert self.names(client, f'genre={first},{second}') == [
+            'Все', 'Два', 'Оба', 'Один'
+        ], (
+            f'Проверьте, что `{self.url}?genre=a,b` возвращает произведения '
+            'хотя бы с одним из жанров, без повторов.'
+        )
+        assert self.names(
+            client, f'genre={first},{second}&mode=all'
+        ) == ['Все', 'Оба'], (
+            f'Проверьте, что `{self.url}?genre=a,b&mode=all` возвращает '
+            'произведения со всеми указанными жанрами.'
+        )
+        assert self.names(
+            client, f'genre={first},{first}&mode=all'
+        ) == ['Все', 'Оба', 'Один']
+        assert self.names(client, f'genre={first},unknown&mode=all') == []
+
+        response = client.get(f'{self.url}?genre={first}&mode=some')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        facets = client.get(
+            f'{self.url}facets/?genre={first},{second}'
+        ).json()
+        assert sum(item['count'] for item in facets['category']) == 4, (
+            'Проверьте, что фильтр по нескольким жанрам не размножает '
+            'произведения в фасетах.'
+        )
+
+    def test_02_links_are_unique(self, admin_client):
+        from reviews.models import GenreTitle
+
+        titles, _ = create_genre_titles(admin_client)
+        link = GenreTitle.objects.filter(title_id=titles['Один']).get()
+        with pytest.raises(IntegrityError), transaction.atomic():
+            GenreTitle.objects.create(
+                title_id=link.title_id, genre_id=link.genre_id
+            )
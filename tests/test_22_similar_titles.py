@@ -0,0 +1,133 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_categories, create_genre, create_single_review
+
+
+def create_title(admin_client, name, genres, category):
+    response = admin_client.post('/api/v1/titles/', data={
+        'name': name,
+        'year': 1990,
+        'genre': genres,
+        'category': category,
+    })
+    assert response.status_code == HTTPStatus.CREATED
+    return response.json()['id']
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22SimilarTitlesAPI:
+
+    def test_01_similar_titles(self, client, admin_client):
+        genres = [genre['slug'] for genre in create_genre(admin_client)]
+        categories = [
+            category['slug'] for category in create_categories(admin_client)
+        ]
+        base = create_title(admin_client, 'База', genres[:2], categories[0])
+        twin = create_title(admin_client, 'Копия', genres[:2], categories[0])
+        half = create_title(admin_client, 'Жанр', genres[:1], categories[0])
+        other = create_title(
+            admin_client, 'Другое', genres[2:], categories[1]
+        )
+        url = f'/api/v1/titles/{base}/similar/'
+
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что эндпоинт `{url}` доступен без авторизации.'
+        )
+        data = response.json()
+        assert [title['id'] for title in data] == [twin, half], (
+            f'Проверьте, что `{url}` сортирует произведения по сходству '
+            'жанров и категории и не возвращает непохожие.'
+        )
+        assert data[0]['similarity'] > data[1]['similarity']
+        assert data[0]['name'] == 'Копия' and len(data[0]['genre']) == 2
+
+        admin_client.patch(f'/api/v1/titles/{other}/', data={
+            'genre': genres[:2], 'category': categories[0]
+        })
+        assert [title['id'] for title in client.get(url).json()] == [
+            twin, other, half
+        ], (
+            f'Проверьте, что `{url}` учитывает изменение жанров '
+            'произведения.'
+        )
+
+        admin_client.delete(f'/api/v1/titles/{twin}/')
+        assert [title['id'] for title in client.get(url).json()] == [
+            other, half
+        ], f'Проверьте, что `{url}` не возвращает удаленные произведения.'
+
+        response = client.get('/api/v1/titles/999999/similar/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_rating_closeness(self, client, admin_client, user_client):
+        genres = [genre['slug'] for genre in create_genre(admin_client)]
+        category = create_categories(admin_client)[0]['slug']
+        ids = [
+            create_title(admin_client, name, genres[:1], category)
+            for name in ('База', 'Близко', 'Далеко')
+        ]
+        for title_id, score in zip(ids, (8, 7, 1)):
+            create_single_review(user_client, title_id, 'текст', score)
+
+        data = client.get(f'/api/v1/titles/{ids[0]}/similar/').json()
+        assert [title['id'] for title in data] == ids[1:], (
+            'Проверьте, что при равных жанрах и категории похожими '
+            'считаются произведения с близким рейтингом.'
+        )
+
+    def test_03_insert_updates_index_in_place(self, client, admin_client,
+                                              monkeypatch):
+        from api.similar import SimilarTitlesIndex, similar_titles
+
+        genres = [genre['slug'] for genre in create_genre(admin_client)]
+        category = create_categories(admin_client)[0]['slug']
+        base = create_title(admin_client, 'База', genres[:2], category)
+        create_title(admin_client, 'Жанр', genres[:1], category)
+        url = f'/api/v1/titles/{base}/similar/'
+        monkeypatch.setattr(similar_titles, 'index', None)
+        client.get(url)
+
+        loads = []
+        load = SimilarTitlesIndex.load.__func__
+        monkeypatch.setattr(SimilarTitlesIndex, 'load', classmethod(
+            lambda cls: loads.append(1) or load(cls)
+        ))
+        twin = create_title(admin_client, 'Копия', genres[:2], category)
+        assert client.get(url).json()[0]['id'] == twin, (
+            'Проверьте, что новое произведение попадает в похожие.'
+        )
+        assert not loads, (
+            'Проверьте, что новое произведение дописывается в индекс '
+            'похожих без его полной перестройки.'
+        )
+
+        admin_client.delete(f'/api/v1/titles/{twin}/')
+        assert twin not in [title['id'] for title in client.get(url).json()]
+        assert len(loads) == 1, (
+            'Проверьте, что удаление произведения перестраивает индекс.'
+        )
+
+    def test_04_reference_deletion_rebuilds_index(self, client,
+                                                  admin_client):
+        genres = [genre['slug'] for genre in create_genre(admin_client)]
+        category = create_categories(admin_client)[0]['slug']
+        base = create_title(admin_client, 'База', genres[:2], category)
+        half = create_title(admin_client, 'Жанр', genres[:1], category)
+        url = f'/api/v1/titles/{base}/similar/'
+        data = client.get(url).json()
+        assert [title['id'] for title in data] == [half]
+        similarity = data[0]['similarity']
+
+        admin_client.delete(f'/api/v1/categories/{category}/')
+        data = client.get(url).json()
+        assert data[0]['similarity'] < similarity, (
+            f'Проверьте, что `{url}` не учитывает удаленную категорию.'
+        )
+
+        admin_client.delete(f'/api/v1/genres/{genres[0]}/')
+        assert client.get(url).json() == [], (
+            f'Проверьте, что `{url}` не учитывает удаленный жанр.'
+        )
@@ -0,0 +1,98 @@
+from http import HTTPStatus
+
+import numpy as np
+import pytest
+from django.core.management import call_command
+
+from tests.test_22_similar_titles import create_title
+from tests.utils import create_categories, create_genre, create_single_review
+
+SCORES = (
+    # A, B, C, D
+    (9, 9, 2, None),
+    (8, 9, 1, 9),
+    (9, 8, 2, 8),
+    (2, 3, 9, 2),
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23RecommendationsAPI:
+    url = '/api/v1/users/me/recommendations/'
+
+    def create_reviews(self, admin_client, django_user_model):
+        from reviews.models import Review
+
+        genre = create_genre(admin_client)[0]['slug']
+        category = create_categories(admin_client)[0]['slug']
+        titles = [
+            create_title(admin_client, name, [genre], category)
+            for name in 'ABCD'
+        ]
+        for number, scores in enumerate(SCORES):
+            author = django_user_model.objects.create_user(
+                username=f'critic{number}', email=f'critic{number}@yamdb.fake'
+            )
+            for title_id, score in zip(titles, scores):
+                if score is not None:
+                    Review.objects.create(
+                        author=author, title_id=title_id, text='.', score=score
+                    )
+        return titles
+
+    def test_01_recommendations(self, client, admin_client, user_client,
+                                django_user_model):
+        a, b, c, d = self.create_reviews(admin_client, django_user_model)
+        create_single_review(user_client, a, 'текст', 9)
+        create_single_review(user_client, c, 'текст', 1)
+        call_command('build_recommendations', workers=1)
+
+        response = user_client.get(self.url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что эндпоинт `{self.url}` доступен пользователю.'
+        )
+        data = response.json()
+        assert {title['id'] for title in data} == {b, d}, (
+            f'Проверьте, что `{self.url}` рекомендует произведения, похожие '
+            'по оценкам на высоко оцененные пользователем, и не '
+            'рекомендует уже оцененные.'
+        )
+        assert all(title['predicted_score'] > 5 for title in data)
+        assert client.get(self.url).status_code == HTTPStatus.UNAUTHORIZED
+
+        create_single_review(user_client, b, 'текст', 10)
+        assert [title['id'] for title in user_client.get(self.url).json()] == [
+            d
+        ], (
+            f'Проверьте, что `{self.url}` пересчитывает рекомендации после '
+            'изменения отзывов пользователя.'
+        )
+
+    def test_02_process_pool(self, monkeypatch):
+        from reviews import recommendations
+
+        rng = np.random.default_rng(0)
+        authors = rng.integers(1, 60, 600)
+        titles = rng.integers(1, 40, 600)
+        scores = rng.integers(1, 11, 600)
+        matrix = recommendations.RatingMatrix(authors, titles, scores)
+        monkeypatch.setattr(recommendations, 'BLOCK_CELLS', 100)
+        monkeypatch.setattr(recommendations, 'USERS_PER_BLOCK', 7)
+
+        serial = recommendations.find_neighbours(matrix, workers=1)
+        pooled = recommendations.find_neighbours(matrix, workers=2)
+        assert len(serial[0]) > 0
+        for expected, result in zip(serial, pooled):
+            assert np.array_equal(expected, result), (
+                'Расчет соседей в пуле процессов должен совпадать с '
+                'последовательным.'
+            )
+
+        serial = recommendations.recommend_all(matrix, serial, workers=1)
+        pooled = recommendations.recommend_all(matrix, pooled, workers=2)
+        assert len(serial[0]) > 0
+        for expected, result in zip(serial, pooled):
+            assert np.array_equal(expected, result), (
+                'Расчет рекомендаций в пуле процессов должен совпадать с '
+                'последовательным.'
+            )
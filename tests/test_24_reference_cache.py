@@ -0,0 +1,108 @@
+import subprocess
+import sys
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.conftest import MANAGE_PATH
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24ReferenceCacheAPI:
+
+    def test_01_list_follows_changes(self, client, admin_client):
+        create_genre(admin_client)
+        url = '/api/v1/genres/'
+        assert [genre['slug'] for genre in client.get(url).json()[
+            'results'
+        ]] == ['drama', 'comedy', 'horror'], (
+            f'Проверьте, что `{url}` отдает жанры по алфавиту названий.'
+        )
+
+        admin_client.post(url, data={'name': 'Аниме', 'slug': 'anime'})
+        admin_client.delete(f'{url}horror/')
+        response = admin_client.get(url)
+        assert [genre['slug'] for genre in response.json()['results']] == [
+            'anime', 'drama', 'comedy'
+        ], (
+            f'Проверьте, что список `{url}` из памяти процесса обновляется '
+            'после создания и удаления жанров.'
+        )
+        assert response.json()['count'] == 3
+
+        response = client.get(url, {'search': 'Дра'})
+        assert [genre['slug'] for genre in response.json()['results']] == [
+            'drama'
+        ], f'Проверьте, что поиск по `{url}` продолжает работать.'
+
+    def test_02_title_write_uses_reference(self, admin_client):
+        genres = [genre['slug'] for genre in create_genre(admin_client)]
+        category = create_categories(admin_client)[0]['slug']
+        admin_client.get('/api/v1/categories/')
+        admin_client.get('/api/v1/genres/')
+        data = {
+            'name': 'Справочник',
+            'year': 2000,
+            'genre': genres,
+            'category': category,
+        }
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['category'] == category
+        assert sorted(response.json()['genre']) == sorted(genres)
+        lookups = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and (
+                'FROM "reviews_category"' in query['sql']
+                or 'WHERE "reviews_genre"."slug"' in query['sql']
+            )
+        ]
+        assert not lookups, (
+            'Проверьте, что слаги жанров и категории при записи '
+            'произведения берутся из справочника в памяти, а не из базы.'
+        )
+
+        data['category'] = 'unknown'
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что неизвестный слаг категории отклоняется.'
+        )
+        admin_client.post(
+            '/api/v1/categories/', data={'name': 'Игры', 'slug': 'unknown'}
+        )
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что новая категория сразу доступна для записи '
+            'произведений.'
+        )
+
+    def test_03_write_in_other_process(self, client, admin_client,
+                                       cache_location):
+        from api.references import genres
+        from reviews.models import Genre
+
+        create_genre(admin_client)
+        url = '/api/v1/genres/'
+        client.get(url)
+        # Запись без сигналов: версию поднимает только другой процесс.
+        Genre.objects.bulk_create([Genre(name='Аниме', slug='anime')])
+        subprocess.run(
+            [sys.executable, 'manage.py', 'shell', '-c',
+             'from django.conf import settings; '
+             f'settings.CACHES["default"]["LOCATION"] = {cache_location!r}; '
+             'from api.cache import bump_version; '
+             'bump_version("reviews.genre")'],
+            cwd=MANAGE_PATH, check=True,
+        )
+        assert genres.get('anime') is not None, (
+            'Проверьте, что версия справочника хранится в общем для '
+            'процессов кэше и запись в другом воркере сбрасывает его.'
+        )
+        assert 'anime' in [
+            genre['slug'] for genre in client.get(url).json()['results']
+        ]
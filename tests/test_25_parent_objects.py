@@ -0,0 +1,75 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+def count_selects(context, table):
+    return sum(
+        1 for query in context.captured_queries
+        if query['sql'].startswith('SELECT')
+        and f'FROM "{table}"' in query['sql']
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25ParentObjectsAPI:
+
+    def test_01_review_create_loads_title_once(self, admin_client,
+                                               user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'Да', 'score': 5})
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['title'] == titles[0]['name']
+        assert count_selects(context, 'reviews_title') == 1, (
+            f'Проверьте, что POST-запрос к `{url}` загружает произведение '
+            'один раз за запрос.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'Да', 'score': 5})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert count_selects(context, 'reviews_title') == 1
+
+    def test_02_comment_create_loads_review_once(self, admin_client,
+                                                 user_client):
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            user_client, titles[0]['id'], 'Отзыв', 5
+        ).json()
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{review["id"]}'
+            '/comments/'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'Комментарий'})
+        assert response.status_code == HTTPStatus.CREATED
+        assert count_selects(context, 'reviews_review') == 1, (
+            f'Проверьте, что POST-запрос к `{url}` загружает отзыв один раз '
+            'за запрос.'
+        )
+        assert count_selects(context, 'reviews_title') == 0
+
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.patch(
+                f'{url}{response.json()["id"]}/', data={'text': 'Правка'}
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert count_selects(context, 'reviews_review') == 1
+
+        wrong_url = (
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{review["id"]}'
+            '/comments/'
+        )
+        response = user_client.post(wrong_url, data={'text': 'Мимо'})
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что отзыв из URL ищется только среди отзывов '
+            'произведения из URL.'
+        )
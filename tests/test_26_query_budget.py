@@ -0,0 +1,209 @@
+import logging
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+TITLES = 60
+USERS = 25
+REVIEWS_PER_USER = 20
+COMMENTS_PER_REVIEW = 3
+
+
+@pytest.fixture
+def dataset(admin, user, django_user_model):
+    """Справочники, произведения, отзывы и комментарии объемом, при
+    котором N+1 заметен по числу запросов."""
+    from reviews.models import (
+        Category, Comment, Genre, GenreTitle, Review, Title, TitleScore
+    )
+
+    Category.objects.bulk_create(
+        Category(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(3)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(6)
+    )
+    categories = list(Category.objects.order_by('pk'))
+    genres = list(Genre.objects.order_by('pk'))
+    for i in range(TITLES):
+        Title(
+            name=f'Произведение {i}',
+            year=1950 + i,
+            category_id=categories[i % 3].pk,
+        ).save()
+    titles = list(Title.objects.order_by('pk'))
+    GenreTitle.objects.bulk_create(
+        GenreTitle(title=title, genre=genres[(i + shift) % 6])
+        for i, title in enumerate(titles)
+        for shift in (0, 1)
+    )
+    django_user_model.objects.bulk_create(
+        django_user_model(username=f'reader{i}', email=f'r{i}@yamdb.fake')
+        for i in range(USERS - 2)
+    )
+    authors = list(django_user_model.objects.order_by('pk'))
+    Review.objects.bulk_create(
+        Review(
+            author=author,
+            title=titles[(i * 7 + j) % TITLES],
+            text=f'Отзыв {i}-{j}',
+            score=(i + j) % 10 + 1,
+        )
+        for i, author in enumerate(authors)
+        for j in range(REVIEWS_PER_USER)
+    )
+    Comment.objects.bulk_create(
+        Comment(author=authors[(review.pk + k) % USERS], review=review,
+                text=f'Комментарий {k}')
+        for review in Review.objects.all()
+        for k in range(COMMENTS_PER_REVIEW)
+    )
+    Title.recalculate_ratings()
+    TitleScore.rebuild()
+    title = titles[0]
+    review = title.reviews.exclude(author=user).order_by('pk').first()
+    own_review = Review.objects.filter(author=user).order_by('pk').first()
+    return {
+        'title': title,
+        'free_title': Title.objects.exclude(reviews__author=user).first(),
+        'review': review,
+        'own_review': own_review,
+        'comment': review.comments.order_by('pk').first(),
+        'genres': [genre.slug for genre in genres],
+        'category': categories[0].slug,
+    }
+
+
+def build_cases(data):
+    title = data['title'].pk
+    review = data['review'].pk
+    reviews = f'/api/v1/titles/{title}/reviews/'
+    comments = f'{reviews}{review}/comments/'
+    own = data['own_review']
+    title_payload = {
+        'name': 'Новое', 'year': 2000,
+        'genre': data['genres'][:2], 'category': data['category'],
+    }
+    return [
+        ('admin', 'get', '/api/v1/categories/', None),
+        ('admin', 'post', '/api/v1/categories/',
+         {'name': 'Новая', 'slug': 'new'}),
+        ('admin', 'delete', '/api/v1/categories/new/', None),
+        ('admin', 'get', '/api/v1/genres/', None),
+        ('admin', 'post', '/api/v1/genres/', {'name': 'Новый', 'slug': 'new'}),
+        ('admin', 'delete', '/api/v1/genres/new/', None),
+        ('admin', 'get', '/api/v1/titles/', None),
+        ('admin', 'get', f'/api/v1/titles/{title}/?expand=reviews', None),
+        ('admin', 'post', '/api/v1/titles/', title_payload),
+        ('admin', 'patch', f'/api/v1/titles/{title}/',
+         {'genre': data['genres'][2:4]}),
+        ('admin', 'get', '/api/v1/titles/top/', None),
+        ('admin', 'get', f'/api/v1/titles/{title}/similar/', None),
+        ('admin', 'get', f'/api/v1/titles/scores/?ids={title},{title + 1}',
+         None),
+        ('admin', 'get', '/api/v1/titles/facets/', None),
+        ('admin', 'get', f'/api/v1/titles/{title}/export/reviews/', None),
+        ('admin', 'get', f'/api/v1/titles/{title}/export/comments/', None),
+        ('admin', 'get', '/api/v1/users/', None),
+        ('admin', 'get', '/api/v1/users/TestUser/', None),
+        ('admin', 'patch', '/api/v1/users/TestUser/', {'bio': 'Новое'}),
+        ('user', 'get', '/api/v1/users/me/', None),
+        ('user', 'patch', '/api/v1/users/me/', {'bio': 'Мое'}),
+        ('user', 'get', '/api/v1/users/me/recommendations/', None),
+        ('admin', 'post', '/api/v1/users/',
+         {'username': 'newbie', 'email': 'newbie@yamdb.fake'}),
+        ('admin', 'get', reviews, None),
+        ('admin', 'get', f'{reviews}{review}/', None),
+        ('user', 'post', f'/api/v1/titles/{data["free_title"].pk}/reviews/',
+         {'text': 'Новый', 'score': 7}),
+        ('user', 'patch', f'/api/v1/titles/{own.title_id}/reviews/{own.pk}/',
+         {'score': 3}),
+        ('admin', 'put', f'{reviews}{review}/',
+         {'text': 'Правка', 'score': 2}),
+        ('admin', 'get', comments, None),
+        ('admin', 'get', f'{comments}{data["comment"].pk}/', None),
+        ('user', 'post', comments, {'text': 'Новый'}),
+        ('admin', 'patch', f'{comments}{data["comment"].pk}/',
+         {'text': 'Правка'}),
+        ('admin', 'put', f'{comments}{data["comment"].pk}/',
+         {'text': 'Еще правка'}),
+        ('admin', 'delete', f'{comments}{data["comment"].pk}/', None),
+        ('admin', 'put', f'/api/v1/titles/{title}/', title_payload),
+        ('admin', 'delete', '/api/v1/users/reader3/', None),
+        ('admin', 'delete', f'{reviews}{review}/', None),
+        ('admin', 'delete', f'/api/v1/titles/{title}/', None),
+    ]
+
+
+def get_budget(method, url):
+    from api.budget import resolve_budget
+
+    return resolve_budget(resolve(url.split('?')[0]).func, method)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26QueryBudgetAPI:
+
+    def test_01_actions_within_budget(self, dataset, admin_client,
+                                      user_client):
+        clients = {'admin': admin_client, 'user': user_client}
+        for role, method, url, data in build_cases(dataset):
+            action, budget = get_budget(method, url)
+            assert budget is not None, (
+                f'Объявите бюджет запросов для действия `{action}` '
+                f'({method.upper()} `{url}`).'
+            )
+            with CaptureQueriesContext(connection) as context:
+                response = getattr(clients[role], method)(
+                    url, data=data, format='json'
+                )
+            assert response.status_code < 400, (
+                f'{method.upper()} `{url}` вернул {response.status_code}.'
+            )
+            assert len(context) <= budget, (
+                f'{method.upper()} `{url}` ({action}) выполнил '
+                f'{len(context)} запросов при бюджете {budget}: '
+                'проверьте, не появился ли N+1.'
+            )
+
+    def test_02_middleware_reports_overrun(self, dataset, admin_client,
+                                           monkeypatch, caplog):
+        from api.budget import query_budget_exceeded
+        from api.views import ReviewViewSet
+
+        monkeypatch.setattr(ReviewViewSet, 'query_budgets', {'list': 1})
+        received = []
+
+        def receiver(**kwargs):
+            received.append(kwargs)
+
+        query_budget_exceeded.connect(receiver)
+        url = f'/api/v1/titles/{dataset["title"].pk}/reviews/'
+        try:
+            with caplog.at_level(logging.WARNING, logger='api.query_budget'):
+                response = admin_client.get(url)
+        finally:
+            query_budget_exceeded.disconnect(receiver)
+
+        assert response.status_code == HTTPStatus.OK
+        assert len(received) == 1, (
+            'Проверьте, что превышение бюджета отправляет сигнал '
+            '`query_budget_exceeded`.'
+        )
+        assert received[0]['action'] == 'list'
+        assert received[0]['queries'] > 1
+        assert any(
+            'FROM "reviews_review"' in sql and '%s' not in sql
+            for sql, _ in received[0]['fingerprints']
+        ), 'Проверьте, что в отчет попадают отпечатки SQL без значений.'
+        assert 'Превышен бюджет запросов' in caplog.text
+        assert url in caplog.text
+
+        caplog.clear()
+        monkeypatch.setattr(ReviewViewSet, 'query_budgets', {'list': 100})
+        admin_client.get(url)
+        assert 'Превышен бюджет запросов' not in caplog.text
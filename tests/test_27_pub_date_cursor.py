@@ -0,0 +1,128 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from tests.utils import create_titles
+
+REVIEWS = 25
+
+
+def collect_pages(client, url, params):
+    ids = []
+    response = client.get(url, params)
+    while True:
+        assert response.status_code == HTTPStatus.OK, response.json()
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что курсорная пагинация не считает COUNT(*).'
+        )
+        ids.extend(item['id'] for item in data['results'])
+        if data['next'] is None:
+            return ids, data
+        response = client.get(data['next'])
+
+
+@pytest.fixture
+def crowded_title(admin_client, django_user_model):
+    from reviews.models import Comment, Review
+
+    titles, _, _ = create_titles(admin_client)
+    title_id = titles[0]['id']
+    django_user_model.objects.bulk_create(
+        django_user_model(username=f'critic{i}', email=f'c{i}@yamdb.fake')
+        for i in range(REVIEWS)
+    )
+    authors = django_user_model.objects.filter(username__startswith='critic')
+    Review.objects.bulk_create(
+        Review(author=author, title_id=title_id, text='Отзыв', score=5)
+        for author in authors
+    )
+    # Совпадающие даты: порядок внутри них задает id.
+    start = timezone.now() - timedelta(days=1)
+    for index, review in enumerate(Review.objects.order_by('pk')):
+        Review.objects.filter(pk=review.pk).update(
+            pub_date=start + timedelta(minutes=index // 3)
+        )
+    review = Review.objects.order_by('pk').first()
+    Comment.objects.bulk_create(
+        Comment(author=author, review=review, text='Комментарий')
+        for author in authors
+    )
+    for index, comment in enumerate(Comment.objects.order_by('pk')):
+        Comment.objects.filter(pk=comment.pk).update(
+            pub_date=start + timedelta(minutes=index // 4)
+        )
+    return title_id, review.pk
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27PubDateCursorAPI:
+
+    def test_01_reviews_cursor(self, client, crowded_title):
+        from reviews.models import Review
+
+        title_id, _ = crowded_title
+        url = f'/api/v1/titles/{title_id}/reviews/'
+        for ordering in ('pub_date', '-pub_date'):
+            expected = list(
+                Review.objects.filter(title_id=title_id)
+                .order_by(ordering, ordering.replace('pub_date', 'id'))
+                .values_list('pk', flat=True)
+            )
+            ids, last_page = collect_pages(
+                client, url, {'pagination': 'cursor', 'ordering': ordering}
+            )
+            assert ids == expected, (
+                f'Проверьте, что курсорная пагинация `{url}` с '
+                f'`ordering={ordering}` обходит все отзывы по (pub_date, id) '
+                'без пропусков и повторов.'
+            )
+            previous = client.get(last_page['previous']).json()
+            assert [item['id'] for item in previous['results']] == (
+                expected[-len(last_page['results']) - 10:
+                         -len(last_page['results'])]
+            ), 'Проверьте ссылку `previous` курсорной пагинации.'
+
+        response = client.get(url, {'ordering': 'score'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что сортировки кроме pub_date отклоняются.'
+        )
+        response = client.get(url)
+        assert response.json()['count'] == REVIEWS, (
+            'Проверьте, что без `pagination=cursor` остается пагинация по '
+            'номерам страниц.'
+        )
+
+    def test_02_comments_cursor(self, client, crowded_title):
+        from reviews.models import Comment
+
+        title_id, review_id = crowded_title
+        url = f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        expected = list(
+            Comment.objects.filter(review_id=review_id)
+            .order_by('-pub_date', '-id').values_list('pk', flat=True)
+        )
+        ids, _ = collect_pages(
+            client, url, {'pagination': 'cursor', 'ordering': '-pub_date'}
+        )
+        assert ids == expected, (
+            f'Проверьте курсорную пагинацию комментариев `{url}`.'
+        )
+
+    def test_03_cursor_uses_indexes(self):
+        from reviews.models import Comment, Review
+
+        plans = (
+            Review.objects.filter(title_id=1).order_by('-pub_date', '-id'),
+            Review.objects.filter(title_id=1).order_by('pub_date', 'id'),
+            Comment.objects.filter(review_id=1).order_by('-pub_date', '-id'),
+            Comment.objects.filter(review_id=1).order_by('pub_date', 'id'),
+        )
+        for queryset in plans:
+            plan = queryset[:10].explain()
+            assert 'TEMP B-TREE' not in plan and '_pub_date_idx' in plan, (
+                'Страница отзывов или комментариев должна читаться по '
+                f'составному индексу (родитель, pub_date, id): {plan}'
+            )
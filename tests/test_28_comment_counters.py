@@ -0,0 +1,144 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_comment, create_single_review
+
+REVIEW_URL = '/api/v1/titles/{title_id}/reviews/'
+
+
+def create_reviewed_title(admin_client, clients):
+    from reviews.models import Category, Title
+
+    category = Category.objects.create(name='Фильм', slug='films')
+    title = Title.objects.create(name='Обсуждаемое', year=2000,
+                                 category=category)
+    reviews = [
+        create_single_review(client, title.pk, 'Отзыв', 5).json()['id']
+        for client in clients
+    ]
+    return title.pk, reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28CommentCountersAPI:
+
+    def test_01_counters_follow_comments(self, admin_client, user_client):
+        title_id, (review_id,) = create_reviewed_title(
+            admin_client, [user_client]
+        )
+        url = f'{REVIEW_URL.format(title_id=title_id)}{review_id}/'
+        comments = [
+            create_single_comment(
+                admin_client, title_id, review_id, f'Комментарий {i}'
+            ).json()
+            for i in range(3)
+        ]
+
+        review = admin_client.get(url).json()
+        assert review['comment_count'] == 3, (
+            f'Проверьте, что ответ `{url}` содержит `comment_count`, '
+            'который растет при создании комментариев.'
+        )
+        assert review['last_comment_at'] == comments[-1]['pub_date'], (
+            f'Проверьте, что `last_comment_at` в ответе `{url}` равен дате '
+            'последнего комментария.'
+        )
+
+        response = admin_client.delete(f'{url}comments/{comments[-1]["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        review = admin_client.get(url).json()
+        assert review['comment_count'] == 2
+        assert review['last_comment_at'] == comments[-2]['pub_date'], (
+            'Проверьте, что после удаления последнего комментария '
+            '`last_comment_at` откатывается к предыдущему.'
+        )
+
+        for comment in comments[:-1]:
+            admin_client.delete(f'{url}comments/{comment["id"]}/')
+        review = admin_client.get(url).json()
+        assert review['comment_count'] == 0
+        assert review['last_comment_at'] is None
+
+        response = admin_client.patch(url, data={'comment_count': 100})
+        assert response.json()['comment_count'] == 0, (
+            'Проверьте, что `comment_count` доступен только для чтения.'
+        )
+
+    def test_02_discussion_orderings(self, admin_client, user_client,
+                                     moderator_client):
+        title_id, reviews = create_reviewed_title(
+            admin_client, [admin_client, user_client, moderator_client]
+        )
+        url = REVIEW_URL.format(title_id=title_id)
+        for review_id, count in zip(reviews, (1, 3, 0)):
+            for i in range(count):
+                create_single_comment(user_client, title_id, review_id, 'К')
+        create_single_comment(user_client, title_id, reviews[0], 'Свежий')
+
+        response = user_client.get(url, {'ordering': '-comment_count'})
+        assert [review['id'] for review in response.json()['results']] == [
+            reviews[1], reviews[0], reviews[2]
+        ], f'Проверьте сортировку `{url}?ordering=-comment_count`.'
+
+        response = user_client.get(
+            url, {'ordering': '-last_comment_at', 'pagination': 'cursor'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert [review['id'] for review in response.json()['results']] == [
+            reviews[0], reviews[1]
+        ], (
+            f'Проверьте, что `{url}?ordering=-last_comment_at` сортирует по '
+            'дате последнего комментария и пропускает отзывы без них.'
+        )
+
+    def test_03_orderings_use_indexes(self):
+        from api.filters import REVIEW_ORDERINGS
+        from reviews.models import Review
+
+        for ordering in REVIEW_ORDERINGS.values():
+            plan = Review.objects.filter(title_id=1).order_by(
+                *ordering
+            )[:10].explain()
+            assert 'TEMP B-TREE' not in plan, (
+                f'Сортировка отзывов {ordering} должна читаться по индексу: '
+                f'{plan}'
+            )
+
+    def test_04_review_update_keeps_counters(self, admin_client,
+                                             user_client):
+        from api.serializers import CommentSerializer, ReviewSerializer
+        from reviews.models import Comment, Review
+
+        title_id, (review_id,) = create_reviewed_title(
+            admin_client, [user_client]
+        )
+        # Отзыв загружен до комментария, как в пересекающемся PATCH.
+        review = Review.objects.get(pk=review_id)
+        comment_id = create_single_comment(
+            admin_client, title_id, review_id, 'Комментарий'
+        ).json()['id']
+        comment = Comment.objects.get(pk=comment_id)
+        Review.objects.filter(pk=review_id).update(is_hidden=True)
+        Comment.objects.filter(pk=comment_id).update(is_hidden=True)
+        for serializer_class, instance in (
+            (ReviewSerializer, review), (CommentSerializer, comment)
+        ):
+            serializer = serializer_class(
+                instance, data={'text': 'Исправлено'}, partial=True
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+        review = Review.objects.get(pk=review_id)
+        assert review.text == 'Исправлено'
+        assert review.comment_count == 1 and review.last_comment_at, (
+            'Проверьте, что изменение отзыва не перезаписывает счетчики '
+            'комментариев, измененные после его загрузки.'
+        )
+        assert review.is_hidden and Comment.objects.get(
+            pk=comment_id
+        ).is_hidden, (
+            'Проверьте, что изменение отзыва или комментария автором не '
+            'снимает скрытие модератором.'
+        )
@@ -0,0 +1,69 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pytest
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.utils import post_json
+
+PARALLEL_POSTS = 8
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29ReviewRaceAPI:
+
+    def test_01_duplicate_review_is_400(self, user_client):
+        from reviews.models import Title
+
+        title = Title.objects.create(name='Одно мнение', year=2000)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        data = {'text': 'Отзыв', 'score': 5}
+
+        assert user_client.post(url, data=data).status_code == (
+            HTTPStatus.CREATED
+        )
+        response = user_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что повторный отзыв автора на произведение '
+            'отклоняется с ответом 400.'
+        )
+        assert response.json() == {'non_field_errors': [
+            'Возможен только один отзыв на произведение!'
+        ]}
+        title.refresh_from_db()
+        assert title.review_count == 1
+
+    def test_02_parallel_posts(self, live_server, user):
+        from reviews.models import Review, Title, TitleScore
+
+        title = Title.objects.create(name='Гонка', year=2000)
+        url = f'{live_server.url}/api/v1/titles/{title.pk}/reviews/'
+        token = str(AccessToken.for_user(user))
+        barrier = threading.Barrier(PARALLEL_POSTS)
+
+        def post(score):
+            barrier.wait()
+            return post_json(url, token, {'text': 'Гонка', 'score': score})
+
+        with ThreadPoolExecutor(PARALLEL_POSTS) as executor:
+            results = list(executor.map(post, range(1, PARALLEL_POSTS + 1)))
+
+        statuses = sorted(status for status, _ in results)
+        assert statuses == [HTTPStatus.CREATED] + [
+            HTTPStatus.BAD_REQUEST
+        ] * (PARALLEL_POSTS - 1), (
+            'Проверьте, что из одновременных отзывов одного автора '
+            'сохраняется один, а остальные получают 400, а не 500: '
+            f'{results}'
+        )
+        title.refresh_from_db()
+        review = Review.objects.get(title=title)
+        assert title.review_count == 1
+        assert title.rating_sum == review.score, (
+            'Проверьте, что отклоненный отзыв не меняет рейтинг.'
+        )
+        assert list(
+            TitleScore.objects.filter(title=title, count__gt=0)
+            .values_list('score', 'count')
+        ) == [(review.score, 1)]
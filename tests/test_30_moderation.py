@@ -0,0 +1,177 @@
+import json
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from tests.utils import create_single_comment, create_single_review
+
+MODERATION_URL = '/api/v1/moderation/{target}/'
+
+
+def moderate(client, target, data):
+    response = client.post(
+        MODERATION_URL.format(target=target), data=data, format='json'
+    )
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что POST-запрос модератора к '
+        f'`{MODERATION_URL.format(target=target)}` возвращает ответ 200.'
+    )
+    assert response['Content-Type'] == 'application/x-ndjson'
+    return [
+        json.loads(line)
+        for line in b''.join(response.streaming_content).splitlines()
+    ]
+
+
+@pytest.fixture
+def discussion(admin_client, user_client, moderator_client):
+    from reviews.models import Title
+
+    titles = [
+        Title.objects.create(name=f'Спорное {i}', year=2000)
+        for i in range(2)
+    ]
+    reviews = {}
+    for title in titles:
+        for client, score in ((admin_client, 9), (user_client, 1),
+                              (moderator_client, 7)):
+            review_id = create_single_review(
+                client, title.pk, 'Отзыв', score
+            ).json()['id']
+            reviews[title.pk, score] = review_id
+            for commenter in (admin_client, user_client):
+                create_single_comment(
+                    commenter, title.pk, review_id, 'Комментарий'
+                )
+    return titles, reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30ModerationAPI:
+
+    def test_01_permissions_and_validation(self, client, user_client,
+                                           moderator_client):
+        url = MODERATION_URL.format(target='reviews')
+        data = {'action': 'delete', 'author': 'TestUser'}
+        assert client.post(url, data=data).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        assert user_client.post(url, data=data).status_code == (
+            HTTPStatus.FORBIDDEN
+        ), 'Проверьте, что массовая модерация недоступна пользователю.'
+
+        response = moderator_client.post(url, data={'action': 'delete'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что модерация без фильтров отклоняется.'
+        )
+        response = moderator_client.post(
+            url, data={'action': 'purge', 'author': 'TestUser'}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_delete_reviews_by_author(self, moderator_client, discussion,
+                                         settings):
+        from reviews.models import Comment, Review, TitleScore
+
+        settings.MODERATION_BATCH_SIZE = 1
+        titles, reviews = discussion
+        lines = moderate(
+            moderator_client, 'reviews',
+            {'action': 'delete', 'author': 'TestUser'}
+        )
+        assert lines == [
+            {'batch': 1, 'processed': 1},
+            {'batch': 2, 'processed': 2},
+            {'done': True, 'processed': 2},
+        ], 'Проверьте, что прогресс отдается строкой NDJSON на порцию.'
+
+        assert not Review.objects.filter(author__username='TestUser').exists()
+        assert not Comment.objects.filter(
+            review_id__in=[reviews[title.pk, 1] for title in titles]
+        ).exists(), 'Проверьте, что комментарии удаленных отзывов удаляются.'
+        for title in titles:
+            title.refresh_from_db()
+            assert (title.review_count, title.rating_sum) == (2, 16), (
+                'Проверьте, что рейтинг пересчитывается после модерации.'
+            )
+            assert not TitleScore.objects.filter(
+                title=title, score=1, count__gt=0
+            ).exists(), 'Проверьте пересчет гистограммы оценок.'
+        response = moderator_client.get(
+            f'/api/v1/titles/{titles[0].pk}/'
+        )
+        assert response.json()['rating'] == 8
+
+    def test_03_hide_reviews_by_title_and_window(self, moderator_client,
+                                                 user_client, discussion):
+        from reviews.models import Review
+
+        titles, reviews = discussion
+        title = titles[0]
+        hidden = reviews[title.pk, 9]
+        Review.objects.filter(pk=hidden).update(
+            pub_date=timezone.now() - timedelta(days=3)
+        )
+        lines = moderate(moderator_client, 'reviews', {
+            'action': 'hide',
+            'title': title.pk,
+            'until': (timezone.now() - timedelta(days=1)).isoformat(),
+        })
+        assert lines[-1] == {'done': True, 'processed': 1}
+
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        ids = [item['id'] for item in user_client.get(url).json()['results']]
+        assert hidden not in ids and len(ids) == 2, (
+            f'Проверьте, что скрытый отзыв не выводится в `{url}`.'
+        )
+        assert user_client.get(f'{url}{hidden}/').status_code == (
+            HTTPStatus.NOT_FOUND
+        )
+        assert user_client.get(f'{url}{hidden}/comments/').status_code == (
+            HTTPStatus.NOT_FOUND
+        ), 'Проверьте, что комментарии скрытого отзыва недоступны.'
+        title.refresh_from_db()
+        assert (title.review_count, title.rating_sum) == (2, 8)
+
+        lines = moderate(moderator_client, 'reviews', {
+            'action': 'hide', 'ids': [hidden],
+        })
+        assert lines == [{'done': True, 'processed': 0}], (
+            'Проверьте, что повторное скрытие не обрабатывает строки.'
+        )
+
+    def test_04_comments(self, moderator_client, user_client, discussion):
+        titles, reviews = discussion
+        title = titles[1]
+        review_id = reviews[title.pk, 7]
+        url = f'/api/v1/titles/{title.pk}/reviews/{review_id}/'
+
+        lines = moderate(moderator_client, 'comments', {
+            'action': 'hide', 'author': 'TestUser', 'title': title.pk,
+        })
+        assert lines[-1] == {'done': True, 'processed': 3}
+        review = user_client.get(url).json()
+        assert review['comment_count'] == 1, (
+            'Проверьте, что скрытые комментарии не учитываются в '
+            '`comment_count`.'
+        )
+        comments = user_client.get(f'{url}comments/').json()['results']
+        assert [comment['author'] for comment in comments] == ['TestAdmin']
+        assert review['last_comment_at'] == comments[0]['pub_date']
+
+        lines = moderate(moderator_client, 'comments', {
+            'action': 'delete', 'ids': [comments[0]['id']],
+        })
+        assert lines[-1] == {'done': True, 'processed': 1}
+        review = user_client.get(url).json()
+        assert (review['comment_count'], review['last_comment_at']) == (
+            0, None
+        )
+        other = user_client.get(
+            f'/api/v1/titles/{titles[0].pk}/reviews/{reviews[titles[0].pk, 7]}/'
+        ).json()
+        assert other['comment_count'] == 2, (
+            'Проверьте, что фильтр по произведению ограничивает модерацию.'
+        )
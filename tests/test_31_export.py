@@ -0,0 +1,117 @@
+import gzip
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_comment, create_single_review
+
+EXPORT_URL = '/api/v1/titles/{title_id}/export/{kind}/'
+
+
+def read_lines(response):
+    content = b''.join(response.streaming_content)
+    if response.get('Content-Encoding') == 'gzip':
+        content = gzip.decompress(content)
+    return [json.loads(line) for line in content.decode().splitlines()]
+
+
+@pytest.fixture
+def discussed_title(admin_client, user_client, moderator_client):
+    from reviews.models import Title
+
+    title = Title.objects.create(name='Выгружаемое', year=2000)
+    other = Title.objects.create(name='Соседнее', year=2000)
+    reviews = [
+        create_single_review(client, title.pk, f'Отзыв «{score}»', score)
+        .json()['id']
+        for client, score in ((admin_client, 9), (user_client, 4),
+                              (moderator_client, 6))
+    ]
+    create_single_review(user_client, other.pk, 'Чужой отзыв', 1)
+    comments = [
+        create_single_comment(client, title.pk, review_id, 'Комментарий')
+        .json()['id']
+        for review_id in reviews
+        for client in (admin_client, user_client)
+    ]
+    return title.pk, reviews, comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test31ExportAPI:
+
+    def test_01_export_reviews(self, client, discussed_title,
+                               django_assert_max_num_queries):
+        title_id, reviews, _ = discussed_title
+        url = EXPORT_URL.format(title_id=title_id, kind='reviews')
+
+        with django_assert_max_num_queries(2):
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            assert response.streaming, (
+                f'Проверьте, что `{url}` отдает ответ потоком.'
+            )
+            lines = read_lines(response)
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        assert [line['id'] for line in lines] == reviews, (
+            f'Проверьте, что `{url}` выгружает все отзывы произведения по '
+            'возрастанию id.'
+        )
+        assert lines[1]['author'] == 'TestUser'
+        assert lines[1]['score'] == 4
+        assert lines[1]['text'] == 'Отзыв «4»'
+        assert lines[1]['comment_count'] == 2
+
+        lines = read_lines(client.get(url, {'after': reviews[0]}))
+        assert [line['id'] for line in lines] == reviews[1:], (
+            f'Проверьте, что `{url}?after=<id>` продолжает выгрузку после '
+            'указанного id.'
+        )
+
+    def test_02_export_comments(self, client, moderator_client,
+                                discussed_title):
+        title_id, reviews, comments = discussed_title
+        url = EXPORT_URL.format(title_id=title_id, kind='comments')
+
+        lines = read_lines(client.get(url))
+        assert [line['id'] for line in lines] == comments, (
+            f'Проверьте, что `{url}` выгружает комментарии ко всем отзывам '
+            'произведения.'
+        )
+        assert {line['review_id'] for line in lines} == set(reviews)
+
+        response = moderator_client.post(
+            '/api/v1/moderation/reviews/',
+            data={'action': 'hide', 'ids': [reviews[0]]},
+            format='json',
+        )
+        b''.join(response.streaming_content)
+        lines = read_lines(client.get(url, {'after': comments[1]}))
+        assert [line['id'] for line in lines] == comments[2:]
+        lines = read_lines(client.get(url))
+        assert [line['id'] for line in lines] == comments[2:], (
+            'Проверьте, что комментарии скрытых отзывов не выгружаются.'
+        )
+
+    def test_03_gzip_and_errors(self, client, discussed_title):
+        title_id, reviews, _ = discussed_title
+        url = EXPORT_URL.format(title_id=title_id, kind='reviews')
+
+        response = client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        assert response['Content-Encoding'] == 'gzip', (
+            f'Проверьте, что `{url}` сжимает ответ, если клиент принимает '
+            'gzip.'
+        )
+        assert 'Accept-Encoding' in response['Vary']
+        assert [line['id'] for line in read_lines(response)] == reviews
+
+        for after in ('last', '²', '-1'):
+            response = client.get(url, {'after': after})
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что `{url}?after={after}` возвращает ошибку 400.'
+            )
+        response = client.get(
+            EXPORT_URL.format(title_id=title_id + 100, kind='reviews')
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
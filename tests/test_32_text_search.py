@@ -0,0 +1,171 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pytest
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.utils import (
+    create_single_comment,
+    create_single_review,
+    post_json,
+)
+
+PARALLEL_POSTS = 8
+
+
+@pytest.fixture
+def reviewed_titles(admin_client, user_client, moderator_client):
+    from reviews.models import Title
+
+    title = Title.objects.create(name='Обсуждаемое', year=2000)
+    other = Title.objects.create(name='Соседнее', year=2000)
+    texts = (
+        (admin_client, 'Сюжет затянут, музыка спасает.'),
+        (user_client, 'СЮЖЕТ! Сюжет держит до конца, сюжетные повороты '
+                      'неожиданны.'),
+        (moderator_client, 'Операторская работа хороша.'),
+    )
+    reviews = [
+        create_single_review(client, title.pk, text, 5).json()['id']
+        for client, text in texts
+    ]
+    create_single_review(user_client, other.pk, 'Сюжет банален.', 3)
+    return title.pk, other.pk, reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test32TextSearchAPI:
+
+    def test_01_search_reviews(self, client, reviewed_titles):
+        title_id, _, reviews = reviewed_titles
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        response = client.get(url, {'search': 'сюжет'})
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        assert [review['id'] for review in results] == [
+            reviews[1], reviews[0]
+        ], (
+            f'Проверьте, что `{url}?search=` ищет по тексту отзывов '
+            'произведения без учета регистра и сортирует по релевантности.'
+        )
+        assert results[0]['snippet'].startswith(
+            '<mark>СЮЖЕТ</mark>! <mark>Сюжет</mark> держит'
+        ), 'Проверьте, что в поле `snippet` подсвечены найденные слова.'
+        assert '<mark>сюжетные</mark>' in results[0]['snippet'], (
+            'Проверьте, что слова запроса ищутся как префиксы.'
+        )
+
+        response = client.get(url, {'search': 'музыка сюж'})
+        assert [review['id'] for review in response.json()['results']] == [
+            reviews[0]
+        ], 'Проверьте, что в найденном отзыве есть все слова запроса.'
+        assert client.get(url, {'search': 'TestUser'}).json()['count'] == 0
+
+        response = client.get(url, {'search': 'сюжет', 'ordering': 'pub_date'})
+        assert [review['id'] for review in response.json()['results']] == [
+            reviews[0], reviews[1]
+        ], 'Проверьте, что `ordering` заменяет сортировку по релевантности.'
+
+        response = client.get(url, {'search': 'сюжет', 'pagination': 'cursor'})
+        assert {review['id'] for review in response.json()['results']} == {
+            reviews[0], reviews[1]
+        }
+
+        response = client.get(url)
+        assert 'snippet' not in response.json()['results'][0], (
+            'Проверьте, что `snippet` есть только в результатах поиска.'
+        )
+
+    def test_02_index_follows_changes(self, client, admin_client,
+                                      moderator_client, reviewed_titles):
+        title_id, _, reviews = reviewed_titles
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        admin_client.patch(f'{url}{reviews[2]}/',
+                           data={'text': 'Сюжет вторичен.'})
+        admin_client.patch(f'{url}{reviews[0]}/',
+                           data={'text': 'Музыка спасает.'})
+        response = client.get(url, {'search': 'сюжет'})
+        assert {review['id'] for review in response.json()['results']} == {
+            reviews[1], reviews[2]
+        }, 'Проверьте, что индекс обновляется при изменении текста отзыва.'
+
+        admin_client.delete(f'{url}{reviews[2]}/')
+        response = moderator_client.post(
+            '/api/v1/moderation/reviews/',
+            data={'action': 'hide', 'ids': [reviews[1]]},
+            format='json',
+        )
+        b''.join(response.streaming_content)
+        response = client.get(url, {'search': 'сюжет'})
+        assert response.json()['results'] == [], (
+            'Проверьте, что удаленные и скрытые отзывы не находятся.'
+        )
+
+    def test_03_search_comments(self, client, user_client, admin_client,
+                                reviewed_titles):
+        title_id, _, reviews = reviewed_titles
+        url = f'/api/v1/titles/{title_id}/reviews/{reviews[0]}/comments/'
+        comments = [
+            create_single_comment(
+                user_client, title_id, reviews[0], text
+            ).json()['id']
+            for text in ('Согласен про музыку.', 'А мне понравился финал.')
+        ]
+        create_single_comment(
+            user_client, title_id, reviews[1], 'Музыка так себе.'
+        )
+
+        response = client.get(url, {'search': 'музык'})
+        results = response.json()['results']
+        assert [comment['id'] for comment in results] == [comments[0]], (
+            f'Проверьте, что `{url}?search=` ищет по тексту комментариев '
+            'отзыва.'
+        )
+        assert results[0]['snippet'] == 'Согласен про <mark>музыку</mark>.'
+
+        admin_client.delete(f'{url}{comments[0]}/')
+        assert client.get(url, {'search': 'музык'}).json()['count'] == 0
+
+    def test_04_search_uses_index(self, reviewed_titles):
+        from reviews.models import Comment, Review
+        from reviews.search import build_text_match_query
+
+        query = build_text_match_query('сюжет')
+        for model in (Review, Comment):
+            plan = model.objects.filter(search__text__match=query).explain()
+            assert 'VIRTUAL TABLE INDEX' in plan, (
+                f'Поиск по {model.__name__} должен идти по индексу FTS5: '
+                f'{plan}'
+            )
+
+    def test_05_parallel_indexed_writes(self, live_server, user,
+                                        reviewed_titles):
+        from reviews.models import Review
+
+        title_id, _, reviews = reviewed_titles
+        url = (
+            f'{live_server.url}/api/v1/titles/{title_id}/reviews/'
+            f'{reviews[0]}/comments/'
+        )
+        token = str(AccessToken.for_user(user))
+        barrier = threading.Barrier(PARALLEL_POSTS)
+
+        def post(index):
+            barrier.wait()
+            return post_json(url, token, {'text': f'Реплика {index}'})
+
+        with ThreadPoolExecutor(PARALLEL_POSTS) as executor:
+            results = list(executor.map(post, range(PARALLEL_POSTS)))
+
+        assert [status for status, _ in results] == [
+            HTTPStatus.CREATED
+        ] * PARALLEL_POSTS, (
+            'Проверьте, что одновременные записи в таблицы с '
+            f'FTS5-индексом ждут блокировку, а не падают с 500: {results}'
+        )
+        assert Review.objects.get(pk=reviews[0]).comment_count == (
+            PARALLEL_POSTS
+        )
@@ -1,4 +1,7 @@
+import json
 from http import HTTPStatus
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
 
 
 check_name_and_slug_patterns = (
@@ -305,3 +308,24 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def post_json(url, token, data):
+    request = Request(
+        url,
+        data=json.dumps(data).encode(),
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/json',
+        },
+        method='POST',
+    )
+    try:
+        with urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as error:
+        body = error.read()
+        try:
+            return error.code, json.loads(body)
+        except ValueError:
+            return error.code, body[-500:]